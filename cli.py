@@ -0,0 +1,116 @@
+import argparse
+import importlib
+import os
+import sys
+
+
+# Scanner modules are only imported for the subcommand that runs them
+SCANNERS = {
+    'pii': 'scan',
+    'links': 'scanlinks',
+    'company-users': 'scan_company_users',
+}
+
+# Command line option => scanner module constant
+OPTIONS = {
+    'debug': 'DEBUG',
+    'max_pages': 'GH_MAX_PAGES',
+    'max_api_calls': 'MAX_API_CALLS',
+    'max_seconds': 'MAX_SCAN_SECONDS',
+    'max_empty_pages': 'MAX_EMPTY_PAGES',
+    'threads': 'MAX_THREADS',
+    'initial_threads': 'INITIAL_THREADS',
+    'depth': 'CRAWL_DEPTH',
+    'max_targets': 'MAX_CRAWL_TARGETS',
+    'crawl_threads': 'CRAWL_THREADS',
+}
+
+
+
+def _add_scan_arguments(parser):
+    parser.add_argument('target', help='domain or org to scan, also the output file name')
+    parser.add_argument('token', nargs='?', default=os.environ.get('GH_TOKEN'), help='github token, defaults to $GH_TOKEN')
+    parser.add_argument('--dry-run', action='store_true', help='print the search and settings without any request')
+    parser.add_argument('--debug', action='store_true', default=None)
+    parser.add_argument('--max-pages', type=int)
+    parser.add_argument('--max-api-calls', type=int)
+    parser.add_argument('--max-seconds', type=int)
+    parser.add_argument('--max-empty-pages', type=int, help='stop after this many pages in a row without findings')
+    parser.add_argument('--threads', type=int, help='upper limit of the adaptive concurrency')
+    parser.add_argument('--initial-threads', type=int)
+
+
+def _add_query_arguments(parser):
+    # Same as findings.FINDINGS_DB, findings is only imported to run a query
+    parser.add_argument('--db', default='findings.db', help='findings database')
+    parser.add_argument('--domain', help='scanned domain or org')
+    parser.add_argument('--email', '--value', dest='value', help='found value, e.g. an email address')
+    parser.add_argument('--repo', help='owner/repo')
+    parser.add_argument('--detector', help='detector name, e.g. email or phone')
+    parser.add_argument('--scanner', choices=list(SCANNERS))
+    parser.add_argument('--since', help='first seen on or after, e.g. 2024-01-31')
+    parser.add_argument('--until', help='first seen before, e.g. 2024-02-07')
+    parser.add_argument('--new-values', action='store_true', help='--since and --until match the first time a value was seen in any file, not per file')
+    parser.add_argument('--format', choices=['text', 'csv', 'jsonl'], default='text')
+    parser.add_argument('--output', help='write to a file instead of stdout')
+
+
+def _get_parser():
+
+    parser = argparse.ArgumentParser(prog='gh-pii-scanner', description='Github Public PII Information Scanner')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    _add_scan_arguments(commands.add_parser('pii', help='emails, phones and other PII of a domain'))
+    links = commands.add_parser('links', help='github.com links in the code of an org')
+    _add_scan_arguments(links)
+    links.add_argument('--depth', type=int, help='crawl the linked accounts up to this depth')
+    links.add_argument('--max-targets', type=int, help='most accounts to crawl')
+    links.add_argument('--crawl-threads', type=int, help='accounts scanned at once')
+    _add_scan_arguments(commands.add_parser('company-users', help='profiles with a company'))
+
+    _add_query_arguments(commands.add_parser('findings', help='query and export the stored findings'))
+
+    return parser
+
+
+def _check_threads(parser, args):
+
+    for option in ['threads', 'initial_threads']:
+        value = getattr(args, option)
+        if value is not None and value < 1:
+            parser.error(f'--{option.replace("_", "-")} must be at least 1')
+
+    if args.threads is not None and args.initial_threads is not None and args.initial_threads > args.threads:
+        parser.error('--initial-threads can not be above --threads')
+
+
+def _scan(args):
+
+    scanner = importlib.import_module(SCANNERS[args.command])
+
+    for option, constant in OPTIONS.items():
+        value = getattr(args, option, None)
+        if value is not None:
+            setattr(scanner, constant, value)
+
+    # A lower --threads also lowers the default initial threads
+    scanner.INITIAL_THREADS = min(scanner.INITIAL_THREADS, scanner.MAX_THREADS)
+
+    scanner.run(args.target, args.token, dry_run=args.dry_run)
+
+
+def main(argv=None):
+
+    parser = _get_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == 'findings':
+        import findings
+        return findings.query(args)
+
+    _check_threads(parser, args)
+    _scan(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
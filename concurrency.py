@@ -0,0 +1,139 @@
+from contextlib import contextmanager
+from collections import deque
+from urllib.parse import urlparse
+
+import threading
+import time
+
+
+# Grow by one worker after this many healthy responses in a row
+INCREASE_AFTER = 10
+# Response is slow when it takes longer than baseline latency * factor
+LATENCY_FACTOR = 2.0
+# Weight of the newest latency in the moving average baseline
+LATENCY_ALPHA = 0.1
+# Only back off once per cooldown, a burst of 429s is one signal
+DECREASE_COOLDOWN = 5
+MAX_HISTORY = 100
+
+
+
+# AIMD (additive increase, multiplicative decrease) limit on the number of
+# requests in flight. Workers take a slot around each request and report the
+# outcome, the limit grows while GitHub is healthy and halves on
+# secondary rate limits, 429s and timeouts.
+class AdaptiveConcurrency:
+
+    def __init__(self, initial=1, minimum=1, maximum=10):
+        self.limit = max(minimum, min(initial, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.active = 0
+        self.requests = 0
+        self.healthy = 0
+        # endpoint => moving average latency, search and contents
+        # requests take very different times
+        self.baselines = {}
+        self.last_decrease = 0
+        self.history = deque(maxlen=MAX_HISTORY)
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active = self.active + 1
+            self.requests = self.requests + 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.active = self.active - 1
+                self._condition.notify_all()
+
+    def record(self, response, latency, url=None):
+
+        if response.status_code == 429:
+            return self._decrease('429 too many requests')
+
+        if response.status_code == 403 and _is_secondary_limit(response):
+            return self._decrease('403 secondary rate limit')
+
+        if response.status_code >= 500:
+            return self._decrease(f'{response.status_code} server error')
+
+        if response.status_code != 200:
+            return
+
+        with self._condition:
+
+            endpoint = _get_endpoint(url)
+            baseline = self.baselines.get(endpoint, latency)
+            self.baselines[endpoint] = baseline + LATENCY_ALPHA * (latency - baseline)
+
+            if latency > baseline * LATENCY_FACTOR:
+                self.healthy = 0
+                return
+
+            self.healthy = self.healthy + 1
+
+            if self.healthy >= INCREASE_AFTER and self.limit < self.maximum:
+                self._change(self.limit + 1, f'{self.healthy} healthy responses')
+
+    def record_timeout(self):
+        self._decrease('timeout')
+
+    def _decrease(self, reason):
+
+        with self._condition:
+            self.healthy = 0
+
+            if time.time() - self.last_decrease < DECREASE_COOLDOWN:
+                return
+
+            self.last_decrease = time.time()
+
+            if self.limit > self.minimum:
+                self._change(max(self.minimum, self.limit // 2), reason)
+
+    def _change(self, limit, reason):
+
+        print(f'\nConcurrency {self.limit} -> {limit} ({reason})\n')
+
+        self.history.append((time.time(), self.limit, limit, reason))
+        self.limit = limit
+        self.healthy = 0
+        self._condition.notify_all()
+
+
+def _get_endpoint(url):
+
+    if not url:
+        return None
+
+    # /search/code, /users/x, /repos/o/r, /repos/o/r/contents/...
+    parts = [part for part in urlparse(url).path.split('/') if part]
+
+    if not parts:
+        return None
+
+    if parts[0] == 'repos' and 'contents' in parts:
+        return 'contents'
+
+    return parts[0]
+
+
+def _is_secondary_limit(response):
+
+    if 'Retry-After' in response.headers:
+        return True
+
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        return False
+
+    text = response.text.lower()
+
+    return 'secondary rate limit' in text or 'abuse' in text
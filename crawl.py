@@ -0,0 +1,91 @@
+from collections import Counter
+
+import re
+import threading
+
+
+MAX_FRONTIER = 1000
+ACCOUNT_REGEX = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})$')
+# github.com/{path} pages which are not accounts
+RESERVED_PATHS = ['about', 'apps', 'blog', 'collections', 'contact', 'customer-stories', 'enterprise', 'events', 'explore', 'features', 'home', 'issues', 'join', 'login', 'marketplace', 'new', 'nonprofit', 'notifications', 'pricing', 'pulls', 'readme', 'search', 'security', 'settings', 'site', 'team', 'topics', 'trending']
+# github.com/{prefix}/{account} pages
+ACCOUNT_PREFIXES = ['orgs', 'sponsors', 'users']
+
+
+
+def get_account(url):
+
+    # https://github.com/owner/repo/blob/... => owner
+    path = re.split(r'[?#]', url.split('github.com', 1)[-1])[0]
+    parts = [part for part in path.split('/') if part]
+
+    if parts and parts[0] in ACCOUNT_PREFIXES:
+        parts = parts[1:]
+
+    if not parts:
+        return None
+
+    account = parts[0]
+
+    if account.lower() in RESERVED_PATHS or not ACCOUNT_REGEX.match(account):
+        return None
+
+    return account.lower()
+
+
+# Accounts waiting to be scanned, the most linked first. Holds at most
+# max_size accounts, the least linked is dropped when it is full. Accounts
+# are only ever handed out once.
+class Frontier:
+
+    def __init__(self, max_depth, max_size=MAX_FRONTIER):
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.counts = Counter()
+        self.depths = {}
+        self.visited = set()
+        self._lock = threading.Lock()
+
+    def add(self, account, depth):
+
+        if depth > self.max_depth:
+            return
+
+        with self._lock:
+
+            if account in self.visited:
+                return
+
+            self.counts[account] = self.counts[account] + 1
+            self.depths[account] = min(depth, self.depths.get(account, depth))
+
+            if len(self.counts) > self.max_size:
+                dropped = min(self.counts, key=self.counts.get)
+                del self.counts[dropped]
+                del self.depths[dropped]
+
+    def visit(self, account):
+
+        with self._lock:
+            self.visited.add(account)
+            self.counts.pop(account, None)
+            self.depths.pop(account, None)
+
+    def pop(self, count):
+
+        with self._lock:
+
+            batch = []
+
+            for account, links in self.counts.most_common(count):
+                batch.append((account, self.depths[account], links))
+
+            for account, depth, links in batch:
+                self.visited.add(account)
+                del self.counts[account]
+                del self.depths[account]
+
+            return batch
+
+    def __len__(self):
+        return len(self.counts)
@@ -0,0 +1,182 @@
+from datetime import datetime, timezone
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+
+FINDINGS_DB = 'findings.db'
+# Commit the inserts in batches, scanners add findings from many threads
+COMMIT_EVERY = 100
+COLUMNS = ['scanner', 'target', 'detector', 'value', 'repo', 'url', 'first_seen', 'last_seen']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    scanner TEXT NOT NULL,
+    target TEXT NOT NULL,
+    detector TEXT NOT NULL,
+    value TEXT NOT NULL,
+    repo TEXT,
+    url TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    UNIQUE (url, detector, value)
+);
+CREATE INDEX IF NOT EXISTS findings_target ON findings (target, first_seen);
+CREATE INDEX IF NOT EXISTS findings_value ON findings (value);
+CREATE INDEX IF NOT EXISTS findings_repo ON findings (repo);
+CREATE INDEX IF NOT EXISTS findings_detector ON findings (detector, first_seen);
+CREATE INDEX IF NOT EXISTS findings_first_seen ON findings (first_seen);
+'''
+
+INSERT = '''
+INSERT INTO findings (scanner, target, detector, value, repo, url, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url, detector, value) DO UPDATE SET last_seen = excluded.last_seen
+'''
+
+
+
+# HELPER FUNCTIONS
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+def _get_repo(url):
+
+    # https://github.com/owner/repo/blob/... => owner/repo
+    parts = url.split('/')
+
+    if len(parts) < 5 or parts[2] != 'github.com':
+        return None
+
+    return f'{parts[3]}/{parts[4]}'
+
+
+
+# STORE
+
+class FindingsStore:
+
+    def __init__(self, path=FINDINGS_DB, read_only=False):
+        self.path = path
+        self.pending = 0
+        self._lock = threading.Lock()
+
+        if read_only:
+            self._connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        else:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(SCHEMA)
+
+        self._connection.row_factory = sqlite3.Row
+
+    def add(self, scanner, target, detector, value, url):
+
+        now = _now()
+
+        with self._lock:
+            self._connection.execute(INSERT, (scanner, target, detector, value, _get_repo(url), url, now, now))
+            self.pending = self.pending + 1
+
+            if self.pending >= COMMIT_EVERY:
+                self._connection.commit()
+                self.pending = 0
+
+    # first_seen is per file, since and until match the values found in a
+    # new file. With new_values the value must also be first seen in any
+    # file in the period, old values in new files are left out.
+    def query(self, target=None, value=None, repo=None, detector=None, scanner=None, since=None, until=None, new_values=False):
+
+        conditions = []
+        params = []
+
+        for column, param in [('target', target), ('value', value), ('repo', repo), ('detector', detector), ('scanner', scanner)]:
+            if param is not None:
+                conditions.append(f'{column} = ?')
+                params.append(param)
+
+        dates = []
+        date_params = []
+
+        if since is not None:
+            dates.append('first_seen >= ?')
+            date_params.append(since)
+
+        if until is not None:
+            dates.append('first_seen < ?')
+            date_params.append(until)
+
+        if new_values and dates:
+            having = ' AND '.join(date.replace('first_seen', 'MIN(first_seen)') for date in dates)
+            where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+            conditions.append(f'(detector, value) IN (SELECT detector, value FROM findings {where} GROUP BY detector, value HAVING {having})')
+            params = params + params + date_params
+
+        conditions = conditions + dates
+        params = params + date_params
+
+        sql = f'SELECT {", ".join(COLUMNS)} FROM findings'
+        if conditions:
+            sql = f'{sql} WHERE {" AND ".join(conditions)}'
+
+        with self._lock:
+            self._connection.commit()
+            return [dict(row) for row in self._connection.execute(f'{sql} ORDER BY first_seen, id', params)]
+
+    def close(self):
+
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+
+
+# EXPORT
+
+def _write_text(rows, output):
+    for row in rows:
+        output.write(f'{row["first_seen"]}  {row["detector"]}  {row["value"]}  {row["url"]}\n')
+
+def _write_csv(rows, output):
+    writer = csv.DictWriter(output, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+def _write_jsonl(rows, output):
+    for row in rows:
+        output.write(f'{json.dumps(row)}\n')
+
+WRITERS = {
+    'text': _write_text,
+    'csv': _write_csv,
+    'jsonl': _write_jsonl,
+}
+
+
+def query(args):
+
+    if not os.path.exists(args.db):
+        sys.exit(f'No findings database at {args.db}')
+
+    store = FindingsStore(args.db, read_only=True)
+    rows = store.query(args.domain, args.value, args.repo, args.detector, args.scanner, args.since, args.until, args.new_values)
+    store.close()
+
+    if not args.output:
+        return WRITERS[args.format](rows, sys.stdout)
+
+    with open(args.output, 'w', newline='') as f:
+        WRITERS[args.format](rows, f)
+
+    print(f'Exported {len(rows)} findings to {args.output}')
+
+
+if __name__ == '__main__':
+    from cli import main
+    main(['findings'] + sys.argv[1:])
@@ -0,0 +1,224 @@
+from collections import deque
+
+import fnmatch
+import os
+import re
+
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules')
+GLOB_PREFIX = 'glob:'
+REGEX_PREFIX = 're:'
+
+# Regex rules are joined into one pattern, these only work on their own:
+# \1 and (?P=name) backreferences and (?(1)...) conditionals
+GROUP_REFERENCE = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]|\(\?P=|\(\?\(')
+# Global flags like (?i) at the start, rewritten to a scoped (?i:...)
+GLOBAL_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+NAMED_GROUP = re.compile(r'\(\?P<\w+>')
+
+
+
+class Rule:
+
+    def __init__(self, kind, pattern, source):
+        self.kind = kind
+        self.pattern = pattern
+        self.source = source
+
+    def __str__(self):
+        return f'{self.source} {self.kind}:{self.pattern}'
+
+
+# Aho-Corasick automaton, finds any of the substrings in one pass over
+# the text however many substrings there are
+class _Automaton:
+
+    def __init__(self, rules):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+
+        for rule in rules:
+            self._add(rule)
+
+        self._link()
+
+    def _add(self, rule):
+
+        state = 0
+
+        for char in rule.pattern:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+
+        if self.output[state] is None:
+            self.output[state] = rule
+
+    def _link(self):
+
+        queue = deque(self.goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+
+                # A shorter rule ending here fires as well
+                if self.output[next_state] is None:
+                    self.output[next_state] = self.output[self.fail[next_state]]
+
+    def search(self, text):
+
+        state = 0
+
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+
+            state = self.goto[state].get(char, 0)
+
+            if self.output[state] is not None:
+                return self.output[state]
+
+        return None
+
+
+# All the globs and all the regexes are joined into one pattern each, the
+# name of the group which matched gives the rule
+class _Alternation:
+
+    def __init__(self, rules, translate):
+        self.rules = rules
+        self.regex = None
+
+        if rules:
+            groups = [f'(?P<r{index}>{translate(rule.pattern)})' for index, rule in enumerate(rules)]
+            self.regex = re.compile('|'.join(groups))
+
+    def search(self, text, anchored=False):
+
+        if self.regex is None:
+            return None
+
+        match = self.regex.match(text) if anchored else self.regex.search(text)
+        if not match:
+            return None
+
+        return self.rules[int(match.lastgroup[1:])]
+
+
+class RuleSet:
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.substrings = _Automaton([rule for rule in rules if rule.kind == 'sub'])
+        self.globs = _Alternation([rule for rule in rules if rule.kind == 'glob'], fnmatch.translate)
+        self.regexes = _Alternation([rule for rule in rules if rule.kind == 're'], _scope_regex)
+
+    def match(self, text):
+
+        if not text:
+            return None
+
+        return self.substrings.search(text) or self.globs.search(text, anchored=True) or self.regexes.search(text)
+
+    def __len__(self):
+        return len(self.rules)
+
+
+# Ignore rules with allow rules on top, returns the ignore rule which fired
+class Filter:
+
+    def __init__(self, ignore, allow):
+        self.ignore = ignore
+        self.allow = allow
+
+    def check(self, text):
+
+        rule = self.ignore.match(text)
+
+        if rule and not self.allow.match(text):
+            return rule
+
+        return None
+
+
+
+def _scope_regex(pattern):
+
+    # Named groups would clash between rules, plain groups are enough
+    pattern = NAMED_GROUP.sub('(', pattern)
+
+    flags = GLOBAL_FLAGS.match(pattern)
+    if flags:
+        return f'(?{flags.group(1)}:{pattern[flags.end():]})'
+
+    return f'(?:{pattern})'
+
+
+def _check_regex(rule):
+
+    try:
+        re.compile(rule.pattern)
+    except re.error as e:
+        raise ValueError(f'{rule.source} invalid regex {rule.pattern}: {e}')
+
+    if GROUP_REFERENCE.search(rule.pattern):
+        raise ValueError(f'{rule.source} backreferences are not supported in {rule.pattern}')
+
+    try:
+        re.compile(_scope_regex(rule.pattern))
+    except re.error as e:
+        raise ValueError(f'{rule.source} regex can not be joined with the other rules {rule.pattern}: {e}')
+
+    return rule
+
+
+def _parse_rule(line, source):
+
+    if line.startswith(GLOB_PREFIX):
+        return Rule('glob', line[len(GLOB_PREFIX):], source)
+
+    if line.startswith(REGEX_PREFIX):
+        return _check_regex(Rule('re', line[len(REGEX_PREFIX):], source))
+
+    return Rule('sub', line, source)
+
+
+def load_rules(path):
+
+    rules = []
+
+    if not os.path.exists(path):
+        return RuleSet(rules)
+
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+
+            if not line.strip() or line.startswith('#'):
+                continue
+
+            rules.append(_parse_rule(line, f'{os.path.basename(path)}:{number}'))
+
+    return RuleSet(rules)
+
+
+# rules/ignore_{name}.txt and rules/allow_{name}.txt, both are optional
+def load_filter(name, rules_dir=RULES_DIR):
+
+    ignore = load_rules(os.path.join(rules_dir, f'ignore_{name}.txt'))
+    allow = load_rules(os.path.join(rules_dir, f'allow_{name}.txt'))
+
+    return Filter(ignore, allow)
@@ -0,0 +1,190 @@
+from urllib.parse import urlparse
+
+import random
+import threading
+import time
+
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 2
+BACKOFF_CAP = 60
+# Open the circuit of a host after this many failures in a row
+FAILURE_THRESHOLD = 5
+# Seconds before an open circuit lets a trial request through
+RESET_AFTER = 60
+
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+# Stops sending requests to a host which keeps failing. After RESET_AFTER
+# seconds one trial request is let through, success closes the circuit.
+class CircuitBreaker:
+
+    def __init__(self, host, failure_threshold=FAILURE_THRESHOLD, reset_after=RESET_AFTER):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+
+        with self._lock:
+
+            if self.opened_at is None:
+                return True
+
+            if time.time() - self.opened_at < self.reset_after:
+                return False
+
+            # Half open, let one request through and wait for its result
+            self.opened_at = time.time()
+            return True
+
+    def wait_time(self):
+
+        with self._lock:
+
+            if self.opened_at is None:
+                return 0
+
+            return max(0, self.reset_after - (time.time() - self.opened_at))
+
+    def success(self):
+
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self):
+
+        with self._lock:
+            self.failures = self.failures + 1
+
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f'\nCircuit open for {self.host} after {self.failures} failures\n')
+                self.opened_at = time.time()
+
+
+# Retries timeouts, connection errors and 5xx with jittered exponential
+# backoff, using one circuit breaker per host.
+class RetryPolicy:
+
+    def __init__(self, retry_on=(), retries=MAX_RETRIES, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+        self.retry_on = retry_on
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url):
+
+        host = urlparse(url).netloc
+
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(host)
+
+            return self.breakers[host]
+
+    def backoff(self, attempt):
+        # Full jitter, spreads the retries of all the workers
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+    # With wait the call sleeps while the circuit is open instead of failing,
+    # for requests which can not be skipped like the search pages
+    def call(self, url, request, wait=False):
+
+        breaker = self.breaker(url)
+
+        for attempt in range(self.retries + 1):
+
+            while not breaker.allow():
+
+                if not wait:
+                    raise CircuitOpenError(f'Circuit open for {breaker.host}')
+
+                wait_time = breaker.wait_time()
+                print(f'Circuit open for {breaker.host}, waiting {int(wait_time)} seconds')
+                time.sleep(wait_time)
+
+            last_attempt = attempt == self.retries
+
+            try:
+                response = request()
+            except self.retry_on as e:
+                breaker.failure()
+
+                if last_attempt:
+                    raise
+
+                print(f'{e}, retrying {url}')
+                time.sleep(self.backoff(attempt))
+                continue
+
+            if response.status_code < 500:
+                breaker.success()
+                return response
+
+            breaker.failure()
+
+            if last_attempt:
+                return response
+
+            print(f'Error code {response.status_code}, retrying {url}')
+            time.sleep(self.backoff(attempt))
+
+    def reset(self):
+
+        with self._lock:
+            for breaker in self.breakers.values():
+                breaker.success()
+
+
+# Response which is still failing after the retries and the rate limit wait,
+# worth trying again later. None is a request which raised.
+def is_transient(response):
+
+    if response is None:
+        return True
+
+    if response.status_code >= 500 or response.status_code == 429:
+        return True
+
+    if response.status_code != 403:
+        return False
+
+    if response.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in response.headers:
+        return True
+
+    return 'rate limit' in response.text.lower()
+
+
+# Items which failed after all the retries, re-driven at the end of a scan
+class DeadLetters:
+
+    def __init__(self):
+        self.items = []
+        self._lock = threading.Lock()
+
+    def add(self, item):
+
+        with self._lock:
+            self.items.append(item)
+
+    def drain(self):
+
+        with self._lock:
+            items = self.items
+            self.items = []
+
+        return items
+
+    def __len__(self):
+        return len(self.items)
@@ -1,36 +1,38 @@
-from multiprocessing.pool import ThreadPool as Pool
-
-import re
-import requests
-import base64
-import json
 import sys
-import time
-import random
-
 
-EMAIL_REGEX = r'[-a-zA-Z\._]+[@](\w|\_|\-|\.)+[.]\w{2,3}'
-PHONE_REGEX = r'\+(\d{1,2}\s)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4,5}'
+from detectors import load_detectors, run_detectors
+from ignore_rules import load_filter
+from scanner import Scanner, decode_base_64
 
 
-REQUEST_TIMEOUT = 40
 GITHUB_SEARCH_API = 'https://api.github.com/search/code?o=desc&q='
 START_PAGE_NUMBER = 1
 SEARCH_QUERY = '"{}"+"email"+NOT+extension%3Amd+NOT+extension%3Atxt+NOT+extension%3Ahtml+NOT+extension%3Aini+NOT+extension%3Aaspx+NOT+extension%3Amarkdown+NOT+extension%3Agemspec+NOT+extension%3Ashtml+NOT+extension%3Arst+NOT+extension%3Acsv+NOT+extension%3Ac+NOT+extension%3Acpp+NOT+extension%3Ah&type=Code&page='
-IGNORE_EMAILS = ['legal', 'support', 'help', 'sales', 'feedback', 'enquiry', 'contact', 'privacy', 'selfservice', 'info@', 'jane.doe', '.com@', 'test@', 'test.com', 'email.com', 'resellers@', '@yourcompany.com', 'resellers', 'example.com', '@domain.com', 'copyright@', 'example@', 'domains@', 'api@', 'feeds', 'customer', 'aaa@', 'bbb@', 'hosted@', 'jobs@', 'git@gitlab.com', 'git@github.com']
-IGNORE_FILES = ['mock', 'test', 'Test', 'package.json', 'AUTHORS', 'change-log', 'setup.py', 'CONTRIBUTORS', 'ChangeLog', 'composer.json', 'pypi_packages', 'commits.json', 'AllVideoPocsFromHackerOne', '.cache.json', 'bugbounty', '.svn', 'inmotionhosting.com', 'marketing', 'attendees']
+# Compiled from rules/ignore_*.txt and rules/allow_*.txt when a run starts
+IGNORE_EMAILS = None
+IGNORE_FILES = None
 GH_RESULTS_PER_PAGE = 30
 GH_MAX_PAGES = 34
-MAX_THREADS = 1
-GH_TOKEN = None
+# Stop the scan early, None disables the check
+MAX_API_CALLS = None
+MAX_SCAN_SECONDS = None
+MAX_EMPTY_PAGES = None
+# Workers in the pool, the adaptive limit decides how many fetch at once
+MAX_THREADS = 10
+INITIAL_THREADS = 1
+DOMAIN = None
 DEBUG = False
+# Fetches, retries and re-drives the requests of a run
+SCANNER = None
+# Detector names from detectors.json, None runs all the enabled detectors
+SCAN_DETECTORS = None
+DETECTORS = None
 
 
 
 # HELPER FUNCTIONS
 
 def _print(text):
-    # TODO Add debug / verbose flag / accept from arg
     if DEBUG:
         print(text)
 
@@ -40,273 +42,119 @@ def _get_url(domain):
     return f'{GITHUB_SEARCH_API}{searchQuery}'
 
 def _get_domain():
-    args = sys.argv
-
-    _print(args)
-    _print(len(args))
-
-    if len(args) < 2:
-        _print('Missing domain')
-        return
-
-    return args[1]
-
-def _get_gh_token():
-    args = sys.argv
-
-    _print(args)
-    _print(len(args))
-
-    if len(args) < 3:
-        _print('Missing token')
-        return
-
-    return args[2]
-
-def _random_wait():
-    random_seconds = random.randint(300, 1000)
-    print(f'\n\nRandom wait. Sleeping for {random_seconds} seconds.\n\n')
-    time.sleep(random_seconds)
-    return True
-
-def _check_rate_limit(response):
-
-    print(response.status_code)
-
-    if response.status_code == 429:
-        return _random_wait()
-        
-
-    if response.status_code == 403:
-
-        if 'X-RateLimit-Remaining' in response.headers:
-            limit_remaining = int(response.headers['X-RateLimit-Remaining'])
-            print(f'Rate limit remaining {limit_remaining}')
-
-            if limit_remaining > 0:
-                return _random_wait()
-
-        if 'X-RateLimit-Reset' in response.headers:
-            reset_time = int(response.headers['X-RateLimit-Reset'])
-            current_time = int(time.time())
-            sleep_time = reset_time - current_time + 1
-            print(f'\n\nGitHub Search API rate limit reached. Sleeping for {sleep_time} seconds.\n\n')
-            time.sleep(sleep_time)
-            return True
-
-        return _random_wait()
-    
-    return False
-
-
-def _get_url_result(url, token):
-
-    try:
-        headers = {}    
-
-        if not token and GH_TOKEN:
-            token = GH_TOKEN
-
-        if token:
-            headers['Authorization'] = f'token {token}'
-
-        _print(headers)
-
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-
-        # if rate limit reached
-        # Check and wait for x seconds
-        if response.status_code != 200:
-            if _check_rate_limit(response):
-                response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-
-        if response.status_code != 200:
-            print(f'\nFailed with error code {response.status_code}\n')
-            print(response.text)
-            return {}
-            
-        return response.json()
-    except Exception as e:
-        print(e)
-        return None
-
-def _get_total_pages(url, gh_token):
-
-    result = _get_url_result(f'{url}{START_PAGE_NUMBER}', gh_token)
-
-    total_count = 1
-    if result and 'total_count' in result:
-        total_count = result['total_count']
-
-    if total_count > GH_RESULTS_PER_PAGE:
-        return int(total_count / GH_RESULTS_PER_PAGE) + 1
-
-    # If total results are less than the total results in one page
-    # Return 2, since page_numbers starts with 1.
-    # So it needs to do 1 iteration
-    return 2
-
-
-def _decode_base_64(text): 
-    try:
-        return base64.b64decode(text).decode("utf-8") 
-    except Exception as e:
-        print(e)
-        return None
-
-
-def _write_to_file(line):
-    # filename = _get_github_username()
-    filename = _get_domain()
-    f = open(f'{filename}.txt', 'a')
-    f.write(f'{line}\n')  # python will convert \n to os.linesep
-    f.close()
-
-
-def _extract_emails(text):
-
-    matches = []
-
-    for iterator in re.finditer(EMAIL_REGEX, text):
-        matches.append(iterator.group())
-
-    return matches
-
-def _extract_phone(text):
-
-    matches = []
-
-    for iterator in re.finditer(PHONE_REGEX, text):
-        matches.append(iterator.group())
-
-    return matches
+    return DOMAIN
 
 
 def _search_content(url, content):
     try:
 
-        if any(value in url for value in IGNORE_FILES):
-            return False
+        rule = IGNORE_FILES.check(url)
+        if rule:
+            _print(f'Ignored {url} by {rule}')
+            return []
 
         _print(content)
-        result = _decode_base_64(content)
+        result = decode_base_64(content)
         _print(str(result))
 
         print(f'Searching in {url}')
 
-        matches = _extract_emails(result)
-        phones = _extract_phone(result)
-
-        if len(matches) == 0 and len(phones) == 0:
-            return False
-
         domain = _get_domain()
 
-        found_email_line = ''
+        # All detectors run over the same blob, validators already
+        # dropped the false positives and non matching domains
+        matches = run_detectors(DETECTORS, result, domain)
 
-        for match in matches:
+        if len(matches) == 0:
+            return []
 
-            # # Match input domain with email
-            if domain not in match:
-                continue
-
-            if any(value in match for value in IGNORE_EMAILS):
-                continue
-            
-            if match not in found_email_line:
-                found_email_line = f'{found_email_line}Found Email: {match}\n'
+        found_email_line = ''
+        found = []
 
-        for match in phones:
+        for detector, match in matches:
 
-            if any(value in match for value in IGNORE_EMAILS):
+            rule = IGNORE_EMAILS.check(match)
+            if rule:
+                _print(f'Ignored {match} by {rule}')
                 continue
             
             if match not in found_email_line:
-                found_email_line = f'{found_email_line}Found Phone: {match}\n'
+                found_email_line = f'{found_email_line}Found {detector.label}: {match}\n'
+                found.append(match)
+                SCANNER.findings.add('pii', domain, detector.name, match, url)
 
         if len(found_email_line) > 0:
+            SCANNER.report(f'\n\nFound in {url}\n{found_email_line}')
 
-            print_line = f'\n\nFound in {url}'
-            print(print_line)
-            _write_to_file(print_line)
-
-            _write_to_file(found_email_line)
-            print(found_email_line)
-            
-            print('\n\n')
+        return found
 
     except Exception as e:
         print(e)
 
-def _is_archived(item, gh_token):
-    if 'repository' in item and 'url' in item['repository']:
-        repo_url = item['repository']['url']
-
-        repo = _get_url_result(repo_url, gh_token)
-
-        if repo and 'archived' in repo:
-            _print(f'{repo["name"]} => Archieved => {str(repo["archived"])}')
-            return repo['archived']
-
-        return False
-
-    return False
-
-def _get_and_search_content(item, gh_token):
+def _get_and_search_content(item):
 
-    if _is_archived(item, gh_token):
+    if SCANNER.is_archived(item):
         return
 
     if 'url' in item:
 
-        result = _get_url_result(item['url'], gh_token)
+        result = SCANNER.get_result(item['url'])
         html_url = item['html_url']
 
-        if result and 'content' in result:
-            _search_content(html_url, result['content'])
-
-
-def process_page(url, gh_token):
-
-    result = _get_url_result(url, gh_token)
-    
-    if result and 'items' in result:
-
-        pool = Pool(MAX_THREADS)
-        
-        items = result['items']
-        for item in items:
-            pool.apply_async(_get_and_search_content, (item,gh_token,))
+        # Transient failure after all the retries
+        if result is None:
+            SCANNER.dead_letters.add(item)
+            return
 
-        pool.daemon = True
-        pool.close()
-        pool.join()
+        if result and 'content' in result:
+            return _search_content(html_url, result['content'])
 
 
 # MAIN CODE
 
-start_time = time.time()
-
-gh_token = _get_gh_token()
+def run(domain, gh_token, dry_run=False):
 
-domain = _get_domain()
+    global DOMAIN, SCANNER, DETECTORS, IGNORE_FILES, IGNORE_EMAILS
 
-url = _get_url(domain)
+    DOMAIN = domain
+    DETECTORS = load_detectors(SCAN_DETECTORS)
+    IGNORE_FILES = load_filter('files')
+    IGNORE_EMAILS = load_filter('emails')
 
-total_urls = 0
-total_pages = _get_total_pages(url, gh_token)
-if total_pages > GH_MAX_PAGES:
-    total_pages = GH_MAX_PAGES
+    url = _get_url(domain)
 
-print(f'Processing pages: {total_pages}')
+    if dry_run:
+        print(f'Search: {url}{START_PAGE_NUMBER}')
+        print(f'Detectors: {", ".join(detector.name for detector in DETECTORS)}')
+        print(f'Ignore rules: {len(IGNORE_FILES.ignore)} files, {len(IGNORE_EMAILS.ignore)} emails')
+        print(f'Pages: {GH_MAX_PAGES}, threads: {INITIAL_THREADS} to {MAX_THREADS}')
+        return
 
-for page_number in range(START_PAGE_NUMBER, total_pages):
-    
-    _print(page_number)
-    print(f'Processing: {url}{page_number}')
+    SCANNER = Scanner(
+        domain,
+        gh_token,
+        _get_and_search_content,
+        max_pages=GH_MAX_PAGES,
+        max_calls=MAX_API_CALLS,
+        max_seconds=MAX_SCAN_SECONDS,
+        max_empty_pages=MAX_EMPTY_PAGES,
+        threads=MAX_THREADS,
+        initial_threads=INITIAL_THREADS,
+        debug=DEBUG,
+    )
+    SCANNER.start()
+
+    # Commit the pending findings on Ctrl-C or an error as well
+    try:
+        SCANNER.scan_pages(f'{url}{START_PAGE_NUMBER}')
 
-    process_page(f'{url}{page_number}',gh_token)
+        SCANNER.redrive_dead_letters()
+    finally:
+        SCANNER.findings.close()
 
+    SCANNER.summary()
 
-print("Processed in %s minutes" % ((time.time() - start_time) / 60))
 
+if __name__ == '__main__':
+    from cli import main
+    main(['pii'] + sys.argv[1:])
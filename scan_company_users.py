@@ -1,69 +1,47 @@
-from multiprocessing.pool import ThreadPool as Pool
-
-import re
-import requests
-import base64
-import json
 import sys
+import threading
 import time
 
-
-EMAIL_REGEX = r'[-a-zA-Z\._]+[@](\w|\_|\-|\.)+[.]\w{2,3}'
-PHONE_REGEX = r'(\+\d{1,2}\s)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4,5}'
+from scanner import Scanner
 
 
-REQUEST_TIMEOUT = 40
 GITHUB_URL='https://github.com'
 GITHUB_USER_API = 'https://api.github.com/users'
 GITHUB_SEARCH_API = 'https://api.github.com/search/code?o=desc&q='
 START_PAGE_NUMBER = 1
-SEARCH_QUERY = 'extension:sql+"airbnb.com"&type=Code&page='
-IGNORE_EMAILS = ['legal', 'support', 'help', 'sales', 'feedback', 'enquiry', 'contact', 'privacy', 'selfservice', 'info@', 'jane.doe', '.com@', 'test@', 'test.com', 'email.com', 'resellers@', '@yourcompany.com', 'resellers', 'example.com', '@domain.com', 'copyright@', 'example@', 'domains@']
-IGNORE_FILES = ['package.json', 'AUTHORS', 'change-log', 'setup.py', 'CONTRIBUTORS', 'ChangeLog', 'composer.json', 'pypi_packages', 'commits.json', 'AllVideoPocsFromHackerOne', '.cache.json', 'bugbounty', '.svn', 'inmotionhosting.com']
+SEARCH_QUERY = 'extension:sql+"{}"&type=Code&page='
 GH_RESULTS_PER_PAGE = 30
 GH_MAX_PAGES = 34
-MAX_THREADS = 1 
-GH_TOKEN = None
+# Stop the scan early, None disables the check
+MAX_API_CALLS = None
+MAX_SCAN_SECONDS = None
+MAX_EMPTY_PAGES = None
+# Workers in the pool, the adaptive limit decides how many fetch at once
+MAX_THREADS = 10
+INITIAL_THREADS = 1
+DOMAIN = None
 DEBUG = False
-PROCESSED = []
+# Fetches, retries and re-drives the requests of a run
+SCANNER = None
+# Owners already looked up, workers check and add under the lock
+PROCESSED = set()
+PROCESSED_LOCK = threading.Lock()
 
 
 
 # HELPER FUNCTIONS
 
 def _print(text):
-    # TODO Add debug / verbose flag / accept from arg
     if DEBUG:
         print(text)
 
 def _get_url(domain):
-    searchQuery = SEARCH_QUERY #.format(domain)
+    searchQuery = SEARCH_QUERY.format(domain)
     _print(searchQuery)
     return f'{GITHUB_SEARCH_API}{searchQuery}'
 
 def _get_domain():
-    args = sys.argv
-
-    _print(args)
-    _print(len(args))
-
-    if len(args) < 2:
-        _print('Missing domain')
-        return
-
-    return args[1]
-
-def _get_gh_token():
-    args = sys.argv
-
-    _print(args)
-    _print(len(args))
-
-    if len(args) < 3:
-        _print('Missing token')
-        return
-
-    return args[2]
+    return DOMAIN
 
 def _check_rate_limit(response):
 
@@ -87,63 +65,7 @@ def _check_rate_limit(response):
     return False
 
 
-def _get_url_result(url, token):
-
-    try:
-        headers = {}    
-
-        if not token and GH_TOKEN:
-            token = GH_TOKEN
-
-        if token:
-            headers['Authorization'] = f'token {token}'
-
-        _print(headers)
-
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-
-        # if rate limit reached
-        # Check and wait for x seconds
-        if response.status_code == 403:
-            if _check_rate_limit(response):
-                response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-
-        if response.status_code != 200:
-            print(f'\nFailed with error code {response.status_code}\n')
-            print(response.text)
-            return {}
-            
-        return response.json()
-    except Exception as e:
-        print(e)
-        return None
-
-def _get_total_pages(url, gh_token):
-
-    result = _get_url_result(f'{url}{START_PAGE_NUMBER}', gh_token)
-
-    total_count = 1
-    if result and 'total_count' in result:
-        total_count = result['total_count']
-
-    if total_count > GH_RESULTS_PER_PAGE:
-        return int(total_count / GH_RESULTS_PER_PAGE) + 1
-
-    # If total results are less than the total results in one page
-    # Return 2, since page_numbers starts with 1.
-    # So it needs to do 1 iteration
-    return 2
-
-
-def _write_to_file(line):
-    # filename = _get_github_username()
-    filename = _get_domain()
-    f = open(f'{filename}.txt', 'a')
-    f.write(f'{line}\n')  # python will convert \n to os.linesep
-    f.close()
-
-
-def _get_and_search_content(item, gh_token):
+def _get_and_search_content(item):
 
     try:
 
@@ -155,68 +77,87 @@ def _get_and_search_content(item, gh_token):
                 return False
 
             username = repo_owner['login']
-            if username in PROCESSED:
-                return False
 
-            PROCESSED.append(username)
+            with PROCESSED_LOCK:
+                if username in PROCESSED:
+                    return False
+
+                PROCESSED.add(username)
+
             user_api = f'{GITHUB_USER_API}/{username}'
-            result = _get_url_result(user_api, gh_token)
+            result = SCANNER.get_result(user_api)
 
             print(user_api)
 
+            # Transient failure after all the retries
+            if result is None:
+                with PROCESSED_LOCK:
+                    PROCESSED.discard(username)
+                SCANNER.dead_letters.add(item)
+                return False
+
             if not result:
                 return False
 
             if 'type' in result and result['type'] == 'Organization':
                 return False
 
-            if 'comapny' not in result or not result['company']:
+            if 'company' not in result or not result['company']:
                 return False
 
             print('Searching Company')
             print_line = f'\nProfile: {GITHUB_URL}/{username}'
             print_line = f'{print_line}\nCompany: {result["company"]}\n\n'
-            print(print_line)
-            _write_to_file(print_line)
+            SCANNER.report(print_line)
+            SCANNER.findings.add('company-users', _get_domain(), 'company', result['company'], f'{GITHUB_URL}/{username}')
+
+            return [result['company']]
 
     except Exception as e:
         print(e)
 
 
-def process_page(url, gh_token):
-
-    result = _get_url_result(url, gh_token)
-    
-    if result and 'items' in result:
-
-        pool = Pool(MAX_THREADS)
-        
-        items = result['items']
-        for item in items:
-            pool.apply_async(_get_and_search_content, (item,gh_token,))
+# MAIN CODE
 
-        pool.daemon = True
-        pool.close()
-        pool.join()
+def run(domain, gh_token, dry_run=False):
 
+    global DOMAIN, SCANNER
 
-# MAIN CODE
+    DOMAIN = domain
 
-gh_token = _get_gh_token()
+    url = _get_url(domain)
 
-domain = _get_domain()
+    if dry_run:
+        print(f'Search: {url}{START_PAGE_NUMBER}')
+        print(f'Pages: {GH_MAX_PAGES}, threads: {INITIAL_THREADS} to {MAX_THREADS}')
+        return
 
-url = _get_url(domain)
+    SCANNER = Scanner(
+        domain,
+        gh_token,
+        _get_and_search_content,
+        max_pages=GH_MAX_PAGES,
+        max_calls=MAX_API_CALLS,
+        max_seconds=MAX_SCAN_SECONDS,
+        max_empty_pages=MAX_EMPTY_PAGES,
+        threads=MAX_THREADS,
+        initial_threads=INITIAL_THREADS,
+        check_rate_limit=_check_rate_limit,
+        debug=DEBUG,
+    )
+    SCANNER.start()
+
+    # Commit the pending findings on Ctrl-C or an error as well
+    try:
+        SCANNER.scan_pages(f'{url}{START_PAGE_NUMBER}')
 
-total_urls = 0
-total_pages = _get_total_pages(url, gh_token)
-if total_pages > GH_MAX_PAGES:
-    total_pages = GH_MAX_PAGES
+        SCANNER.redrive_dead_letters()
+    finally:
+        SCANNER.findings.close()
 
-for page_number in range(START_PAGE_NUMBER, total_pages):
-    
-    _print(page_number)
-    print(f'Processing: {url}{page_number}')
+    SCANNER.summary()
 
-    process_page(f'{url}{page_number}',gh_token)
 
+if __name__ == '__main__':
+    from cli import main
+    main(['company-users'] + sys.argv[1:])
@@ -1,173 +1,64 @@
-from multiprocessing.pool import ThreadPool as Pool
-
-import re
-import requests
-import base64
-import json
 import sys
-import time
-import random
-
 
-# URL_REGEX = r'https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9]{1,6}\b([-a-zA-Z0-9@:%_\+.~#?&\/=]*)'
-URL_REGEX = r'https?:\/\/(www\.)?github.com\b([-a-zA-Z0-9@:%_\+.~#?&\/=]*)'
+from crawl import Frontier, get_account
+from detectors import load_detectors, run_detectors
+from ignore_rules import load_filter
+from scanner import Scanner, decode_base_64
 
 
-REQUEST_TIMEOUT = 40
 GITHUB_SEARCH_API = 'https://api.github.com/search/code?o=desc&q='
 START_PAGE_NUMBER = 1
 SEARCH_QUERY = 'org%3A{}+"github.com"&type=Code&page='
+# Crawled accounts can be users or orgs
+CRAWL_QUERY = 'user%3A{}+"github.com"&type=Code&page='
 GH_RESULTS_PER_PAGE = 30
 GH_MAX_PAGES = 34
-MAX_THREADS = 5
+# Stop the scan early, None disables the check
+MAX_API_CALLS = None
+MAX_SCAN_SECONDS = None
+MAX_EMPTY_PAGES = None
+# Workers in the pool, the adaptive limit decides how many fetch at once
+MAX_THREADS = 20
+INITIAL_THREADS = 5
 MAX_MATCH_COUNTS = 50
-GH_TOKEN = None
+# Scan the accounts linked from the target, and the accounts linked from
+# those, up to this depth. 0 only scans the target
+CRAWL_DEPTH = 0
+CRAWL_THREADS = 4
+MAX_CRAWL_TARGETS = 100
+# Compiled from rules/ignore_links.txt and rules/allow_links.txt when a run starts
+IGNORE_LINKS = None
+DOMAIN = None
 DEBUG = False
+# Fetches, retries and re-drives the requests of a run
+SCANNER = None
+SCAN_DETECTORS = ['github_url']
+DETECTORS = None
 
 
 
 # HELPER FUNCTIONS
 
 def _print(text):
-    # TODO Add debug / verbose flag / accept from arg
     if DEBUG:
         print(text)
 
-def _get_url(domain):
-    searchQuery = SEARCH_QUERY.format(domain)
+def _get_url(domain, query=SEARCH_QUERY):
+    searchQuery = query.format(domain)
     _print(searchQuery)
     return f'{GITHUB_SEARCH_API}{searchQuery}'
 
 def _get_domain():
-    args = sys.argv
-
-    _print(args)
-    _print(len(args))
-
-    if len(args) < 2:
-        _print('Missing domain')
-        return
-
-    return args[1]
-
-def _get_gh_token():
-    args = sys.argv
-
-    _print(args)
-    _print(len(args))
-
-    if len(args) < 3:
-        _print('Missing token')
-        return
-
-    return args[2]
-
-def _random_wait():
-    random_seconds = random.randint(300, 1000)
-    print(f'\n\nRandom wait. Sleeping for {random_seconds} seconds.\n\n')
-    time.sleep(random_seconds)
-    return True
-
-def _check_rate_limit(response):
-
-    print(response.status_code)
-
-    if response.status_code == 429:
-        return _random_wait()
-        
-
-    if response.status_code == 403:
-
-        if 'X-RateLimit-Remaining' in response.headers:
-            limit_remaining = int(response.headers['X-RateLimit-Remaining'])
-            print(f'Rate limit remaining {limit_remaining}')
-
-            if limit_remaining > 0:
-                return _random_wait()
-
-        if 'X-RateLimit-Reset' in response.headers:
-            reset_time = int(response.headers['X-RateLimit-Reset'])
-            current_time = int(time.time())
-            sleep_time = reset_time - current_time + 1
-            print(f'\n\nGitHub Search API rate limit reached. Sleeping for {sleep_time} seconds.\n\n')
-            time.sleep(sleep_time)
-            return True
-
-        return _random_wait()
-    
-    return False
-
-
-def _get_url_result(url, token):
-
-    try:
-        headers = {}    
-
-        if not token and GH_TOKEN:
-            token = GH_TOKEN
-
-        if token:
-            headers['Authorization'] = f'token {token}'
-
-        _print(headers)
-
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-
-        # if rate limit reached
-        # Check and wait for x seconds
-        if response.status_code != 200:
-            if _check_rate_limit(response):
-                response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-
-        if response.status_code != 200:
-            print(f'\nFailed with error code {response.status_code}\n')
-            print(response.text)
-            return {}
-            
-        return response.json()
-    except Exception as e:
-        print(e)
-        return None
-
-def _get_total_pages(url, gh_token):
-
-    result = _get_url_result(f'{url}{START_PAGE_NUMBER}', gh_token)
-
-    total_count = 1
-    if result and 'total_count' in result:
-        total_count = result['total_count']
-
-    if total_count > GH_RESULTS_PER_PAGE:
-        return int(total_count / GH_RESULTS_PER_PAGE) + 1
-
-    # If total results are less than the total results in one page
-    # Return 2, since page_numbers starts with 1.
-    # So it needs to do 1 iteration
-    return 2
-
-
-def _decode_base_64(text): 
-    try:
-        return base64.b64decode(text).decode("utf-8") 
-    except Exception as e:
-        print(e)
-        return None
-
-
-def _write_to_file(line):
-    # filename = _get_github_username()
-    filename = _get_domain()
-    f = open(f'{filename}.txt', 'a')
-    f.write(f'{line}\n')  # python will convert \n to os.linesep
-    f.close()
+    return DOMAIN
 
 
 def _extract_urls(text):
 
     matches = []
 
-    for iterator in re.finditer(URL_REGEX, text):
-        matches.append(iterator.group())
+    # Every occurrence, MAX_MATCH_COUNTS counts the repeated links as well
+    for detector, match in run_detectors(DETECTORS, text, unique=False):
+        matches.append(match)
 
     return matches
 
@@ -176,7 +67,7 @@ def _search_content(url, content):
     try:
 
         _print(content)
-        result = _decode_base_64(content)
+        result = decode_base_64(content)
         _print(str(result))
 
         print(f'Searching in {url}')
@@ -184,45 +75,33 @@ def _search_content(url, content):
         matches = _extract_urls(result)
 
         if len(matches) == 0 or len(matches) > MAX_MATCH_COUNTS:
-            return False
+            return []
 
         domain = _get_domain()
 
         found_url_line = ''
+        found = []
 
         for match in matches:
+
+            rule = IGNORE_LINKS.check(match)
+            if rule:
+                _print(f'Ignored {match} by {rule}')
+                continue
             
             if match not in found_url_line:
                 found_url_line = f'{found_url_line}{match}\n'
+                found.append(match)
+                SCANNER.findings.add('links', domain, 'github_url', match, url)
 
         if len(found_url_line) > 0:
+            SCANNER.report(f'\nFound in {url}\n{found_url_line}')
 
-            print_line = f'\nFound in {url}'
-            print(print_line)
-            _write_to_file(print_line)
-
-            _write_to_file(found_url_line)
-            print(found_url_line)
-            
-            print('\n')
+        return found
 
     except Exception as e:
         print(e)
 
-def _is_archived(item, gh_token):
-    if 'repository' in item and 'url' in item['repository']:
-        repo_url = item['repository']['url']
-
-        repo = _get_url_result(repo_url, gh_token)
-
-        if repo and 'archived' in repo:
-            _print(f'{repo["name"]} => Archieved => {str(repo["archived"])}')
-            return repo['archived']
-
-        return False
-
-    return False
-
 def _convert_to_raw_url(html_url):
 
     html_url = html_url.replace('https://github.com', 'https://raw.githubusercontent.com')
@@ -230,14 +109,14 @@ def _convert_to_raw_url(html_url):
 
     return html_url
 
-def _get_and_search_content(item, gh_token):
+def _get_and_search_content(item):
 
-    if _is_archived(item, gh_token):
+    if SCANNER.is_archived(item):
         return
 
     if 'url' in item:
 
-        result = _get_url_result(item['url'], gh_token)
+        result = SCANNER.get_result(item['url'])
         html_url = item['html_url']
 
         raw_html_url = _convert_to_raw_url(html_url)
@@ -246,51 +125,131 @@ def _get_and_search_content(item, gh_token):
 
         # _write_to_file(f'{raw_html_url}')
 
+        # Transient failure after all the retries
+        if result is None:
+            SCANNER.dead_letters.add(item)
+            return
+
         if result and 'content' in result:
-            _search_content(html_url, result['content'])
+            return _search_content(html_url, result['content'])
 
 
-def process_page(url, gh_token):
+def _crawl_account(target):
 
-    result = _get_url_result(url, gh_token)
-    
-    if result and 'items' in result:
+    account, depth, count = target
 
-        pool = Pool(MAX_THREADS)
-        
-        items = result['items']
-        for item in items:
-            pool.apply_async(_get_and_search_content, (item,gh_token,))
+    print(f'\nCrawling {account} (depth {depth}, {count} links)\n')
 
-        pool.daemon = True
-        pool.close()
-        pool.join()
+    return target, SCANNER.scan_pages(f'{_get_url(account, CRAWL_QUERY)}{START_PAGE_NUMBER}')
+
+
+def crawl(domain, links):
+
+    from multiprocessing.pool import ThreadPool as Pool
+    from queue import Queue
+
+    frontier = Frontier(CRAWL_DEPTH)
+    frontier.visit(domain.lower())
+
+    for link in links:
+        account = get_account(link)
+        if account:
+            frontier.add(account, 1)
+
+    # Each worker takes the next account as soon as it is done, and the
+    # links of every finished account go into the frontier straight away
+    pool = Pool(CRAWL_THREADS)
+    results = Queue()
+    running = 0
+    targets = 0
+    stop_reason = None
+
+    while True:
+
+        while not stop_reason and running < CRAWL_THREADS and len(frontier) > 0 and targets < MAX_CRAWL_TARGETS:
+
+            # The budgets are shared by the whole crawl, not per account
+            stop_reason = SCANNER.budget_spent()
+            if stop_reason:
+                print(f'Crawl stopped: {stop_reason}')
+                break
+
+            for target in frontier.pop(1):
+                pool.apply_async(_crawl_account, (target,), callback=results.put, error_callback=lambda e, target=target: results.put((target, [])))
+                running = running + 1
+                targets = targets + 1
+
+        if running == 0:
+            break
+
+        (account, depth, count), account_links = results.get()
+        running = running - 1
+
+        for link in account_links:
+            linked_account = get_account(link)
+            if linked_account:
+                frontier.add(linked_account, depth + 1)
+
+    pool.close()
+    pool.join()
+
+    print(f'Crawled {targets} accounts, {len(frontier)} left in the frontier')
 
 
 # MAIN CODE
 
-start_time = time.time()
+def run(domain, gh_token, dry_run=False):
+
+    global DOMAIN, SCANNER, DETECTORS, IGNORE_LINKS
 
-gh_token = _get_gh_token()
+    DOMAIN = domain
+    DETECTORS = load_detectors(SCAN_DETECTORS)
+    IGNORE_LINKS = load_filter('links')
 
-domain = _get_domain()
+    url = _get_url(domain)
 
-url = _get_url(domain)
+    if dry_run:
+        print(f'Search: {url}{START_PAGE_NUMBER}')
+        print(f'Detectors: {", ".join(detector.name for detector in DETECTORS)}')
+        print(f'Ignore rules: {len(IGNORE_LINKS.ignore)} links')
+        print(f'Pages: {GH_MAX_PAGES}, threads: {INITIAL_THREADS} to {MAX_THREADS}')
+        print(f'Crawl depth: {CRAWL_DEPTH}, max targets: {MAX_CRAWL_TARGETS}, crawl threads: {CRAWL_THREADS}')
+        return
 
-total_urls = 0
-total_pages = _get_total_pages(url, gh_token)
-if total_pages > GH_MAX_PAGES:
-    total_pages = GH_MAX_PAGES
+    SCANNER = Scanner(
+        domain,
+        gh_token,
+        _get_and_search_content,
+        max_pages=GH_MAX_PAGES,
+        max_calls=MAX_API_CALLS,
+        max_seconds=MAX_SCAN_SECONDS,
+        max_empty_pages=MAX_EMPTY_PAGES,
+        threads=MAX_THREADS,
+        initial_threads=INITIAL_THREADS,
+        debug=DEBUG,
+    )
+    SCANNER.start()
+
+    # Commit the pending findings on Ctrl-C or an error as well
+    try:
+        links = SCANNER.scan_pages(f'{url}{START_PAGE_NUMBER}')
 
-print(f'Processing pages: {total_pages}')
+        # Re-drive before the crawl, the links of the pages and files which
+        # failed at first are crawled as well
+        links = links + SCANNER.redrive_dead_letters()
 
-for page_number in range(START_PAGE_NUMBER, total_pages):
-    
-    _print(page_number)
-    print(f'Processing: {url}{page_number}')
+        if CRAWL_DEPTH > 0:
+            crawl(domain, links)
 
-    process_page(f'{url}{page_number}',gh_token)
+            # Failures of the crawled accounts, their links are stored but
+            # not crawled any further
+            SCANNER.redrive_dead_letters()
+    finally:
+        SCANNER.findings.close()
 
+    SCANNER.summary()
 
-print("Processed in %s minutes" % ((time.time() - start_time) / 60))
 
+if __name__ == '__main__':
+    from cli import main
+    main(['links'] + sys.argv[1:])
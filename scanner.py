@@ -0,0 +1,316 @@
+import random
+import threading
+import time
+
+from concurrency import AdaptiveConcurrency
+from retry import DeadLetters, RetryPolicy, is_transient
+from search import SearchPages
+
+
+REQUEST_TIMEOUT = 40
+# Passes over the failed items at the end of the scan
+REDRIVE_ROUNDS = 2
+# Workers finish files at the same time, one block of findings is printed
+# and written at a time so the blocks do not interleave
+OUTPUT_LOCK = threading.Lock()
+
+
+
+# HELPER FUNCTIONS
+
+def _random_wait():
+    random_seconds = random.randint(300, 1000)
+    print(f'\n\nRandom wait. Sleeping for {random_seconds} seconds.\n\n')
+    time.sleep(random_seconds)
+    return True
+
+def check_rate_limit(response):
+
+    print(response.status_code)
+
+    if response.status_code == 429:
+        return _random_wait()
+
+
+    if response.status_code == 403:
+
+        if 'X-RateLimit-Remaining' in response.headers:
+            limit_remaining = int(response.headers['X-RateLimit-Remaining'])
+            print(f'Rate limit remaining {limit_remaining}')
+
+            if limit_remaining > 0:
+                return _random_wait()
+
+        if 'X-RateLimit-Reset' in response.headers:
+            reset_time = int(response.headers['X-RateLimit-Reset'])
+            current_time = int(time.time())
+            sleep_time = reset_time - current_time + 1
+            print(f'\n\nGitHub Search API rate limit reached. Sleeping for {sleep_time} seconds.\n\n')
+            time.sleep(sleep_time)
+            return True
+
+        return _random_wait()
+
+    return False
+
+def decode_base_64(text):
+
+    import base64
+
+    try:
+        return base64.b64decode(text).decode("utf-8")
+    except Exception as e:
+        print(e)
+        return None
+
+def _parse_response(response):
+
+    if response is None:
+        return None
+
+    if response.status_code != 200:
+        print(f'\nFailed with error code {response.status_code}\n')
+        print(response.text)
+
+        # Still failing after the retries and the rate limit wait
+        if is_transient(response):
+            return None
+
+        return {}
+
+    try:
+        return response.json()
+    except Exception as e:
+        print(e)
+        return None
+
+
+
+# SCANNER
+
+# Fetch, retry and re-drive plumbing shared by the scanners, which only
+# bring the matching. process_item(item) fetches and searches one search
+# result and returns the values found in it, an item which still fails
+# after the retries goes to dead_letters. check_rate_limit(response)
+# returns True when the request should be sent again.
+class Scanner:
+
+    def __init__(self, target, token, process_item, max_pages=None, max_calls=None, max_seconds=None, max_empty_pages=None, threads=10, initial_threads=1, check_rate_limit=check_rate_limit, debug=False):
+        self.target = target
+        self.token = token
+        self.process_item = process_item
+        self.max_pages = max_pages
+        self.max_calls = max_calls
+        self.max_seconds = max_seconds
+        self.max_empty_pages = max_empty_pages
+        self.threads = threads
+        self.initial_threads = initial_threads
+        self.check_rate_limit = check_rate_limit
+        self.debug = debug
+        self.dead_letters = DeadLetters()
+        self.failed_pages = DeadLetters()
+        # repo api url => archived, shared by all the searches of a run
+        self.archived = {}
+        self.start_time = None
+        self.concurrency = None
+        self.retry = None
+        self.findings = None
+
+    def start(self):
+
+        import requests
+
+        from findings import FindingsStore
+
+        # MAX_SCAN_SECONDS counts from here, for every search of the run
+        self.start_time = time.time()
+        self.concurrency = AdaptiveConcurrency(self.initial_threads, maximum=self.threads)
+        self.retry = RetryPolicy(retry_on=(requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+        self.findings = FindingsStore()
+
+    def summary(self):
+        print("Processed in %s minutes" % ((time.time() - self.start_time) / 60))
+        print(f'Final concurrency {self.concurrency.limit}, {len(self.concurrency.history)} changes')
+
+    def _print(self, text):
+        if self.debug:
+            print(text)
+
+    def _request(self, url, headers):
+
+        import requests
+
+        with self.concurrency.slot():
+
+            start_time = time.time()
+
+            try:
+                response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            except requests.exceptions.Timeout:
+                self.concurrency.record_timeout()
+                raise
+
+            self.concurrency.record(response, time.time() - start_time, url)
+
+        return response
+
+    def get_response(self, url, wait=False):
+
+        try:
+            headers = {}
+
+            if self.token:
+                headers['Authorization'] = f'token {self.token}'
+
+            self._print(headers)
+
+            response = self.retry.call(url, lambda: self._request(url, headers), wait)
+
+            # if rate limit reached
+            # Check and wait for x seconds
+            if response.status_code != 200:
+                if self.check_rate_limit(response):
+                    response = self.retry.call(url, lambda: self._request(url, headers), wait)
+
+            return response
+        except Exception as e:
+            print(e)
+            return None
+
+    # None when the request is still failing after the retries and the rate
+    # limit wait, {} for an error response which is not worth retrying
+    def get_result(self, url):
+        return _parse_response(self.get_response(url))
+
+    def _get_search_page(self, url):
+
+        # Waits for an open circuit, a skipped page would end the scan
+        response = self.get_response(url, wait=True)
+        result = _parse_response(response)
+
+        next_url = None
+        if result and 'next' in response.links:
+            next_url = response.links['next']['url']
+
+        return result, next_url
+
+    def is_archived(self, item):
+
+        if 'repository' in item and 'url' in item['repository']:
+            repo_url = item['repository']['url']
+
+            if repo_url in self.archived:
+                return self.archived[repo_url]
+
+            repo = self.get_result(repo_url)
+
+            if repo and 'archived' in repo:
+                self._print(f'{repo["name"]} => Archieved => {str(repo["archived"])}')
+                self.archived[repo_url] = repo['archived']
+                return repo['archived']
+
+            return False
+
+        return False
+
+    def _write_to_file(self, line):
+        f = open(f'{self.target}.txt', 'a')
+        f.write(f'{line}\n')  # python will convert \n to os.linesep
+        f.close()
+
+    def report(self, block):
+
+        with OUTPUT_LOCK:
+            print(block)
+            self._write_to_file(block)
+
+    def process_items(self, items):
+
+        from multiprocessing.pool import ThreadPool as Pool
+
+        pool = Pool(self.threads)
+
+        results = []
+        for item in items:
+            results.append(pool.apply_async(self.process_item, (item,)))
+
+        pool.daemon = True
+        pool.close()
+        pool.join()
+
+        values = []
+        for result in results:
+            try:
+                values.extend(result.get() or [])
+            except Exception as e:
+                print(e)
+
+        return values
+
+    def scan_pages(self, page_url):
+
+        values = []
+
+        pages = SearchPages(
+            page_url,
+            self._get_search_page,
+            max_pages=self.max_pages,
+            max_calls=self.max_calls,
+            max_seconds=self.max_seconds,
+            max_empty_pages=self.max_empty_pages,
+            calls=lambda: self.concurrency.requests,
+            start_time=self.start_time,
+        )
+
+        for page_url, items in pages:
+
+            print(f'Processing: {page_url}')
+
+            found = self.process_items(items)
+            pages.report(len(found))
+            values.extend(found)
+
+        # Resumed from this page when the failed items are re-driven
+        if pages.failed_url:
+            self.failed_pages.add(pages.failed_url)
+
+        return values
+
+    # Returns the values found in the pages and items which failed before
+    def redrive_dead_letters(self):
+
+        values = []
+
+        for round_number in range(REDRIVE_ROUNDS):
+
+            if len(self.dead_letters) == 0 and len(self.failed_pages) == 0:
+                return values
+
+            print(f'Retrying {len(self.failed_pages)} failed pages and {len(self.dead_letters)} failed items')
+
+            self.retry.reset()
+
+            for page_url in self.failed_pages.drain():
+                values.extend(self.scan_pages(page_url))
+
+            values.extend(self.process_items(self.dead_letters.drain()))
+
+        for page_url in self.failed_pages.drain():
+            print(f'Failed: {page_url}')
+
+        for item in self.dead_letters.drain():
+            print(f'Failed: {item.get("html_url")}')
+
+        return values
+
+    # The budgets of the whole run, for work outside a single search
+    def budget_spent(self):
+
+        if self.max_seconds is not None and time.time() - self.start_time >= self.max_seconds:
+            return f'reached {self.max_seconds} seconds'
+
+        if self.max_calls is not None and self.concurrency.requests >= self.max_calls:
+            return f'reached {self.max_calls} API calls'
+
+        return None
+
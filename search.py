@@ -0,0 +1,89 @@
+import time
+
+
+# Walks the GitHub search result pages by following the `Link: rel=next`
+# header, so the first page is fetched once and no extra request is needed
+# to count the pages. Stops early on the API call budget, the wall clock
+# budget or after a run of pages without findings.
+#
+# fetch(url) returns (result, next_url), result is None when the page failed
+# to fetch. calls() returns the API calls made so far. Report the findings
+# of every page with report(findings). failed_url is the page a failed scan
+# can be resumed from. Pass the start_time of the whole scan to share the
+# wall clock budget between several searches.
+class SearchPages:
+
+    def __init__(self, url, fetch, max_pages=None, max_calls=None, max_seconds=None, max_empty_pages=None, calls=None, start_time=None):
+        self.url = url
+        self.fetch = fetch
+        self.max_pages = max_pages
+        self.max_calls = max_calls
+        self.max_seconds = max_seconds
+        self.max_empty_pages = max_empty_pages
+        self.calls = calls
+        self.pages = 0
+        self.empty_pages = 0
+        self.stop_reason = None
+        self.failed_url = None
+        self.start_time = start_time or time.time()
+
+    def __iter__(self):
+
+        url = self.url
+
+        while url:
+
+            self.stop_reason = self._check_budget()
+            if self.stop_reason:
+                break
+
+            result, next_url = self.fetch(url)
+
+            if result is None:
+                self.failed_url = url
+                self.stop_reason = f'failed to fetch {url}'
+                break
+
+            # An error response which is not worth retrying, e.g. 422
+            if not result:
+                self.stop_reason = f'error response for {url}'
+                break
+
+            if 'items' not in result:
+                self.stop_reason = 'no results'
+                break
+
+            self.pages = self.pages + 1
+
+            yield url, result['items']
+
+            url = next_url
+
+        if not self.stop_reason:
+            self.stop_reason = 'last page'
+
+        print(f'Stopped after {self.pages} pages: {self.stop_reason}')
+
+    def report(self, findings):
+
+        if findings > 0:
+            self.empty_pages = 0
+            return
+
+        self.empty_pages = self.empty_pages + 1
+
+    def _check_budget(self):
+
+        if self.max_pages is not None and self.pages >= self.max_pages:
+            return f'reached {self.max_pages} pages'
+
+        if self.max_calls is not None and self.calls and self.calls() >= self.max_calls:
+            return f'reached {self.max_calls} API calls'
+
+        if self.max_seconds is not None and time.time() - self.start_time >= self.max_seconds:
+            return f'reached {self.max_seconds} seconds'
+
+        if self.max_empty_pages is not None and self.empty_pages >= self.max_empty_pages:
+            return f'{self.empty_pages} pages without findings'
+
+        return None
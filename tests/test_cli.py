@@ -0,0 +1,103 @@
+import importlib
+import sys
+
+import pytest
+
+import cli
+
+
+@pytest.fixture
+def runs(monkeypatch):
+
+    runs = []
+
+    for name in cli.SCANNERS.values():
+        scanner = importlib.import_module(name)
+
+        # Restored after the test, _scan sets them on the module
+        for constant in list(cli.OPTIONS.values()) + ['INITIAL_THREADS']:
+            if hasattr(scanner, constant):
+                monkeypatch.setattr(scanner, constant, getattr(scanner, constant))
+
+        monkeypatch.setattr(scanner, 'run', lambda target, token, dry_run=False, scanner=scanner: runs.append((scanner, target, token, dry_run)))
+
+    return runs
+
+
+@pytest.mark.parametrize('command', ['pii', 'links', 'company-users'])
+def test_options_map_to_scanner_constants(command):
+
+    scanner = importlib.import_module(cli.SCANNERS[command])
+    args = cli._get_parser().parse_args([command, 'acme.com'])
+
+    for option, constant in cli.OPTIONS.items():
+        if hasattr(args, option):
+            assert hasattr(scanner, constant), f'{command} --{option} has no {constant}'
+
+
+def test_scan_sets_the_options(runs):
+
+    cli.main(['links', 'acme', 'token', '--max-pages', '3', '--threads', '8', '--initial-threads', '2', '--depth', '2', '--debug'])
+
+    scanner, target, token, dry_run = runs[0]
+
+    assert scanner.__name__ == 'scanlinks'
+    assert (target, token, dry_run) == ('acme', 'token', False)
+    assert scanner.GH_MAX_PAGES == 3
+    assert scanner.MAX_THREADS == 8
+    assert scanner.INITIAL_THREADS == 2
+    assert scanner.CRAWL_DEPTH == 2
+    assert scanner.DEBUG is True
+
+
+def test_unset_options_keep_the_defaults(runs):
+
+    cli.main(['pii', 'acme.com', '--dry-run'])
+
+    scanner = runs[0][0]
+
+    assert runs[0][3] is True
+    assert scanner.GH_MAX_PAGES == 34
+    assert scanner.DEBUG is False
+
+
+def test_lower_threads_caps_the_initial_threads(runs):
+
+    cli.main(['links', 'acme', '--threads', '2'])
+
+    scanner = runs[0][0]
+
+    assert scanner.MAX_THREADS == 2
+    assert scanner.INITIAL_THREADS == 2
+
+
+@pytest.mark.parametrize('argv', [
+    ['company-users', 'acme.com', '--threads', '2', '--initial-threads', '5'],
+    ['pii', 'acme.com', '--threads', '0'],
+    ['pii', 'acme.com', '--initial-threads', '0'],
+])
+def test_rejects_bad_threads(runs, argv):
+
+    with pytest.raises(SystemExit):
+        cli.main(argv)
+
+    assert runs == []
+
+
+def test_token_defaults_to_environment(monkeypatch):
+
+    monkeypatch.setenv('GH_TOKEN', 'secret')
+
+    assert cli._get_parser().parse_args(['pii', 'acme.com']).token == 'secret'
+
+
+def test_findings_does_not_import_the_scanners(tmp_path, monkeypatch):
+
+    for name in cli.SCANNERS.values():
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    with pytest.raises(SystemExit):
+        cli.main(['findings', '--db', str(tmp_path / 'missing.db')])
+
+    for name in cli.SCANNERS.values():
+        assert name not in sys.modules
@@ -0,0 +1,119 @@
+import pytest
+
+import concurrency
+from concurrency import AdaptiveConcurrency, _get_endpoint
+
+SEARCH_URL = 'https://api.github.com/search/code?q=x&page=1'
+CONTENTS_URL = 'https://api.github.com/repos/o/r/contents/a.py'
+
+
+class Response:
+
+    def __init__(self, status_code=200, headers=None, text=''):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+@pytest.fixture(autouse=True)
+def no_cooldown(monkeypatch):
+    monkeypatch.setattr(concurrency, 'DECREASE_COOLDOWN', 0)
+
+
+def test_increases_after_healthy_responses():
+
+    controller = AdaptiveConcurrency(1, maximum=3)
+
+    for index in range(concurrency.INCREASE_AFTER * 5):
+        controller.record(Response(), 0.2, CONTENTS_URL)
+
+    assert controller.limit == 3
+    assert [change[1:] for change in controller.history] == [(1, 2, '10 healthy responses'), (2, 3, '10 healthy responses')]
+
+
+@pytest.mark.parametrize('initial, limit', [(5, 2), (0, 1), (2, 2)])
+def test_initial_limit_is_clamped(initial, limit):
+    assert AdaptiveConcurrency(initial, maximum=2).limit == limit
+
+
+def test_mixed_endpoints_still_increase():
+
+    controller = AdaptiveConcurrency(1, maximum=10)
+
+    for index in range(600):
+        if index % 30 == 0:
+            controller.record(Response(), 1.0 + index % 7 / 20, SEARCH_URL)
+        else:
+            controller.record(Response(), 0.15 + index % 5 / 50, CONTENTS_URL)
+
+    assert controller.limit == 10
+
+
+def test_slow_response_resets_streak():
+
+    controller = AdaptiveConcurrency(1, maximum=3)
+
+    for index in range(concurrency.INCREASE_AFTER - 1):
+        controller.record(Response(), 0.2, CONTENTS_URL)
+
+    controller.record(Response(), 2.0, CONTENTS_URL)
+
+    assert controller.healthy == 0
+    assert controller.limit == 1
+
+
+@pytest.mark.parametrize('response, reason', [
+    (Response(429), '429 too many requests'),
+    (Response(403, {'X-RateLimit-Remaining': '10'}, 'You have exceeded a secondary rate limit'), '403 secondary rate limit'),
+    (Response(403, {'Retry-After': '60'}), '403 secondary rate limit'),
+    (Response(502), '502 server error'),
+])
+def test_backs_off(response, reason):
+
+    controller = AdaptiveConcurrency(8, maximum=10)
+    controller.record(response, 0.2, CONTENTS_URL)
+
+    assert controller.limit == 4
+    assert controller.history[-1][3] == reason
+
+
+def test_primary_limit_and_not_found_do_not_back_off():
+
+    controller = AdaptiveConcurrency(8, maximum=10)
+    controller.record(Response(403, {'X-RateLimit-Remaining': '0'}), 0.2, CONTENTS_URL)
+    controller.record(Response(404), 0.2, CONTENTS_URL)
+
+    assert controller.limit == 8
+
+
+def test_timeout_backs_off_to_minimum():
+
+    controller = AdaptiveConcurrency(3, minimum=1, maximum=10)
+
+    for index in range(5):
+        controller.record_timeout()
+
+    assert controller.limit == 1
+
+
+def test_slot_counts_requests():
+
+    controller = AdaptiveConcurrency(2)
+
+    with controller.slot():
+        with controller.slot():
+            assert controller.active == 2
+
+    assert controller.active == 0
+    assert controller.requests == 2
+
+
+@pytest.mark.parametrize('url, endpoint', [
+    (SEARCH_URL, 'search'),
+    (CONTENTS_URL, 'contents'),
+    ('https://api.github.com/repos/o/r', 'repos'),
+    ('https://api.github.com/users/u', 'users'),
+    (None, None),
+])
+def test_get_endpoint(url, endpoint):
+    assert _get_endpoint(url) == endpoint
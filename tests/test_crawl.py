@@ -0,0 +1,76 @@
+import pytest
+
+from crawl import Frontier, get_account
+
+
+@pytest.mark.parametrize('url, account', [
+    ('https://github.com/Foo/bar/blob/main/x.py', 'foo'),
+    ('https://github.com/foo', 'foo'),
+    ('http://www.github.com/bob?tab=repositories', 'bob'),
+    ('https://github.com/bob#readme', 'bob'),
+    ('https://github.com/orgs/acme/people', 'acme'),
+    ('https://github.com/sponsors/alice', 'alice'),
+    ('https://github.com/features/actions', None),
+    ('https://github.com/login', None),
+    ('https://github.com/', None),
+    ('https://github.com', None),
+    ('https://github.com/-bad', None),
+])
+def test_get_account(url, account):
+    assert get_account(url) == account
+
+
+def test_pops_most_linked_first():
+
+    frontier = Frontier(max_depth=2)
+
+    for account in ['a', 'b', 'b', 'c', 'c', 'c']:
+        frontier.add(account, 1)
+
+    assert frontier.pop(2) == [('c', 1, 3), ('b', 1, 2)]
+    assert frontier.pop(2) == [('a', 1, 1)]
+    assert frontier.pop(2) == []
+
+
+def test_accounts_are_handed_out_once():
+
+    frontier = Frontier(max_depth=2)
+    frontier.visit('seed')
+
+    frontier.add('seed', 1)
+    frontier.add('a', 1)
+    frontier.pop(1)
+    frontier.add('a', 2)
+
+    assert len(frontier) == 0
+
+
+def test_depth_limit_and_shallowest_depth():
+
+    frontier = Frontier(max_depth=1)
+
+    frontier.add('deep', 2)
+    frontier.add('a', 1)
+    frontier.add('a', 1)
+
+    assert frontier.pop(5) == [('a', 1, 2)]
+
+    frontier = Frontier(max_depth=3)
+    frontier.add('a', 3)
+    frontier.add('a', 2)
+
+    assert frontier.pop(1) == [('a', 2, 2)]
+
+
+def test_bounded_drops_least_linked():
+
+    frontier = Frontier(max_depth=1, max_size=2)
+
+    frontier.add('a', 1)
+    frontier.add('a', 1)
+    frontier.add('b', 1)
+    frontier.add('b', 1)
+    frontier.add('c', 1)
+
+    assert len(frontier) == 2
+    assert [account for account, depth, links in frontier.pop(5)] == ['a', 'b']
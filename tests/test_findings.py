@@ -0,0 +1,146 @@
+import argparse
+import csv
+import json
+import sqlite3
+
+import pytest
+
+import findings
+from findings import FindingsStore, _get_repo
+
+URL = 'https://github.com/owner/repo/blob/main/a.py'
+OTHER_URL = 'https://github.com/owner/other/blob/main/b.py'
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = '2024-01-01T00:00:00'
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(findings, '_now', clock)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FindingsStore(str(tmp_path / 'findings.db'))
+    yield store
+    store.close()
+
+
+def _args(db, **options):
+
+    args = {
+        'db': db, 'domain': None, 'value': None, 'repo': None, 'detector': None, 'scanner': None,
+        'since': None, 'until': None, 'new_values': False, 'format': 'text', 'output': None,
+    }
+    args.update(options)
+
+    return argparse.Namespace(**args)
+
+
+@pytest.mark.parametrize('url, repo', [
+    (URL, 'owner/repo'),
+    ('https://github.com/owner/repo', 'owner/repo'),
+    ('https://github.com/owner', None),
+    ('https://api.github.com/repos/owner/repo', None),
+])
+def test_get_repo(url, repo):
+    assert _get_repo(url) == repo
+
+
+def test_same_finding_updates_last_seen(store, clock):
+
+    store.add('pii', 'acme.com', 'email', 'john@acme.com', URL)
+    clock.now = '2024-01-08T00:00:00'
+    store.add('pii', 'acme.com', 'email', 'john@acme.com', URL)
+
+    rows = store.query()
+
+    assert len(rows) == 1
+    assert rows[0]['first_seen'] == '2024-01-01T00:00:00'
+    assert rows[0]['last_seen'] == '2024-01-08T00:00:00'
+    assert rows[0]['repo'] == 'owner/repo'
+
+
+def test_since_and_until(store, clock):
+
+    for now, value in [('2024-01-01T00:00:00', 'a@acme.com'), ('2024-01-07T23:59:59', 'b@acme.com'), ('2024-01-08T00:00:00', 'c@acme.com')]:
+        clock.now = now
+        store.add('pii', 'acme.com', 'email', value, URL)
+
+    assert [row['value'] for row in store.query(since='2024-01-07')] == ['b@acme.com', 'c@acme.com']
+    assert [row['value'] for row in store.query(until='2024-01-08')] == ['a@acme.com', 'b@acme.com']
+    assert [row['value'] for row in store.query(since='2024-01-08T00:00:00')] == ['c@acme.com']
+
+
+def test_new_values(store, clock):
+
+    store.add('pii', 'acme.com', 'email', 'old@acme.com', URL)
+    clock.now = '2024-01-08T00:00:00'
+    store.add('pii', 'acme.com', 'email', 'old@acme.com', OTHER_URL)
+    store.add('pii', 'acme.com', 'email', 'new@acme.com', OTHER_URL)
+
+    assert [row['value'] for row in store.query(since='2024-01-08')] == ['old@acme.com', 'new@acme.com']
+    assert [row['value'] for row in store.query(since='2024-01-08', new_values=True)] == ['new@acme.com']
+    assert [row['value'] for row in store.query(target='acme.com', until='2024-01-08', new_values=True)] == ['old@acme.com']
+
+
+def test_filters(store):
+
+    store.add('pii', 'acme.com', 'email', 'john@acme.com', URL)
+    store.add('pii', 'acme.com', 'phone', '+14155552671', OTHER_URL)
+    store.add('links', 'acme', 'github_url', 'https://github.com/acme', URL)
+
+    assert len(store.query(target='acme.com')) == 2
+    assert [row['value'] for row in store.query(repo='owner/other')] == ['+14155552671']
+    assert [row['value'] for row in store.query(scanner='links')] == ['https://github.com/acme']
+
+
+def test_export_csv_and_jsonl(tmp_path):
+
+    store = FindingsStore(str(tmp_path / 'findings.db'))
+    store.add('pii', 'acme.com', 'email', 'john@acme.com', URL)
+    store.close()
+
+    db = str(tmp_path / 'findings.db')
+
+    findings.query(_args(db, format='csv', output=str(tmp_path / 'out.csv')))
+    with open(tmp_path / 'out.csv', newline='') as f:
+        rows = list(csv.DictReader(f))
+
+    assert [row['value'] for row in rows] == ['john@acme.com']
+    assert list(rows[0]) == findings.COLUMNS
+
+    findings.query(_args(db, format='jsonl', output=str(tmp_path / 'out.jsonl')))
+    with open(tmp_path / 'out.jsonl') as f:
+        rows = [json.loads(line) for line in f]
+
+    assert rows[0]['url'] == URL
+    assert rows[0]['repo'] == 'owner/repo'
+
+
+def test_query_is_read_only(tmp_path):
+
+    FindingsStore(str(tmp_path / 'findings.db')).close()
+    reader = FindingsStore(str(tmp_path / 'findings.db'), read_only=True)
+
+    with pytest.raises(sqlite3.OperationalError):
+        reader._connection.execute(findings.INSERT, ('pii', 'a', 'email', 'v', None, URL, 'x', 'x'))
+
+    reader.close()
+
+
+def test_query_missing_database(tmp_path):
+
+    with pytest.raises(SystemExit):
+        findings.query(_args(str(tmp_path / 'missing.db')))
+
+    assert not (tmp_path / 'missing.db').exists()
@@ -0,0 +1,111 @@
+import pytest
+
+from ignore_rules import Filter, Rule, RuleSet, _Automaton, load_filter, load_rules
+
+
+def _rules(*patterns, kind='sub'):
+    return [Rule(kind, pattern, f'test:{index}') for index, pattern in enumerate(patterns, 1)]
+
+
+@pytest.mark.parametrize('patterns, text, expected', [
+    (['he', 'she', 'his', 'hers'], 'ushers', 'she'),
+    (['he', 'she', 'his', 'hers'], 'ahishers', 'his'),
+    # Shorter rule inside a longer one fires through the failure link
+    (['abcd', 'bc'], 'xabcx', 'bc'),
+    (['abcd', 'bcd'], 'abcd', 'abcd'),
+    (['aab', 'ab'], 'aaab', 'aab'),
+    (['test', 'Test'], 'src/Tests/x.py', 'Test'),
+    (['package.json'], 'https://github.com/o/r/blob/m/package.json', 'package.json'),
+    (['mock'], 'https://github.com/o/r/blob/m/src/main.py', None),
+    (['abc'], '', None),
+    ([], 'anything', None),
+])
+def test_automaton_search(patterns, text, expected):
+
+    rule = _Automaton(_rules(*patterns)).search(text)
+
+    assert (rule.pattern if rule else None) == expected
+
+
+def test_automaton_matches_substring_check():
+
+    patterns = ['legal', 'info@', '.com@', 'test.com', 'example.com', 'aaa@', 'git@github.com']
+    automaton = _Automaton(_rules(*patterns))
+
+    for text in ['legal@acme.com', 'me@test.com', 'aaaa@acme.com', 'x.com@y', 'john@acme.com', 'git@github.co', 'ab']:
+        assert bool(automaton.search(text)) == any(pattern in text for pattern in patterns)
+
+
+@pytest.mark.parametrize('kind, pattern, text, matched', [
+    ('sub', 'vendor/', 'https://github.com/o/r/blob/m/vendor/x.js', True),
+    ('sub', 'vendor/', 'https://github.com/o/r/blob/m/src/x.js', False),
+    ('glob', '*.min.js', 'https://github.com/o/r/blob/m/app.min.js', True),
+    # Globs match the whole text
+    ('glob', '*.min.js', 'https://github.com/o/r/blob/m/app.min.js.map', False),
+    ('glob', 'https://github.com/*/dotfiles/*', 'https://github.com/u/dotfiles/blob/m/x', True),
+    ('re', r'^https://github\.com/[^/]+/dotfiles', 'https://github.com/u/dotfiles/x', True),
+    ('re', r'\d{3}-0000', 'call 555-0000', True),
+    ('re', r'\d{3}-0000', 'call 555-1234', False),
+    ('re', r'(?i)secret', 'A SECRET value', True),
+    ('re', r'(?P<name>lib)/y', 'a/lib/y', True),
+])
+def test_rule_set_kinds(kind, pattern, text, matched):
+
+    rule_set = RuleSet(_rules(pattern, kind=kind))
+
+    assert bool(rule_set.match(text)) == matched
+
+
+def test_rule_set_reports_rule():
+
+    rule_set = RuleSet(_rules('aaa', kind='sub') + _rules('*.lock', kind='glob') + _rules(r'(?i)x(y)z', 'b+c', kind='re'))
+
+    assert rule_set.match('yarn.lock').pattern == '*.lock'
+    assert rule_set.match('abbbc').pattern == 'b+c'
+    assert rule_set.match('XYZ').pattern == '(?i)x(y)z'
+    assert rule_set.match('nothing') is None
+    assert rule_set.match('') is None
+
+
+def test_load_rules(tmp_path):
+
+    path = tmp_path / 'ignore_files.txt'
+    path.write_text('# comment\n\nmock\nglob:*.min.js\nre:^docs/\n')
+
+    rule_set = load_rules(str(path))
+
+    assert [(rule.kind, rule.pattern) for rule in rule_set.rules] == [('sub', 'mock'), ('glob', '*.min.js'), ('re', '^docs/')]
+    assert str(rule_set.match('src/mock.py')) == 'ignore_files.txt:3 sub:mock'
+
+
+@pytest.mark.parametrize('line', [r're:(a)\1', 're:(?P<x>a)(?P=x)', 're:(a)(?(1)b|c)', 're:[', 're:a(?i)b'])
+def test_load_rules_rejects_regex_with_source(tmp_path, line):
+
+    path = tmp_path / 'ignore_files.txt'
+    path.write_text(f'mock\n{line}\n')
+
+    with pytest.raises(ValueError, match='ignore_files.txt:2'):
+        load_rules(str(path))
+
+
+def test_load_rules_missing_file(tmp_path):
+    assert len(load_rules(str(tmp_path / 'missing.txt'))) == 0
+
+
+def test_filter_allow_wins(tmp_path):
+
+    (tmp_path / 'ignore_x.txt').write_text('vendor/\n')
+    (tmp_path / 'allow_x.txt').write_text('vendor/keep\n')
+
+    ignore_filter = load_filter('x', str(tmp_path))
+
+    assert str(ignore_filter.check('a/vendor/b')) == 'ignore_x.txt:1 sub:vendor/'
+    assert ignore_filter.check('a/vendor/keep/c') is None
+    assert ignore_filter.check('a/src/c') is None
+
+
+def test_shipped_rules_load():
+
+    assert load_filter('files').check('https://github.com/o/r/blob/m/package.json')
+    assert load_filter('emails').check('support@acme.com')
+    assert isinstance(load_filter('links'), Filter)
@@ -0,0 +1,164 @@
+import pytest
+
+import retry
+from retry import CircuitBreaker, CircuitOpenError, DeadLetters, RetryPolicy, is_transient
+
+URL = 'https://api.github.com/repos/o/r/contents/a.py'
+
+
+class Response:
+
+    def __init__(self, status_code=200, headers=None, text=''):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now = self.now + seconds
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry, 'time', clock)
+    return clock
+
+
+def _requests(*outcomes):
+
+    outcomes = list(outcomes)
+    calls = []
+
+    def request():
+        calls.append(1)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return request, calls
+
+
+def test_retries_until_success():
+
+    request, calls = _requests(TimeoutError('timed out'), Response(502), Response(200))
+
+    response = RetryPolicy(retry_on=(TimeoutError,)).call(URL, request)
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+def test_returns_last_5xx():
+
+    request, calls = _requests(*[Response(503)] * 4)
+
+    response = RetryPolicy(retries=3).call(URL, request)
+
+    assert response.status_code == 503
+    assert len(calls) == 4
+
+
+def test_raises_last_exception():
+
+    request, calls = _requests(*[TimeoutError('timed out')] * 2)
+
+    with pytest.raises(TimeoutError):
+        RetryPolicy(retry_on=(TimeoutError,), retries=1).call(URL, request)
+
+
+def test_does_not_retry_4xx():
+
+    request, calls = _requests(Response(404))
+
+    assert RetryPolicy().call(URL, request).status_code == 404
+    assert len(calls) == 1
+
+
+def test_backoff_is_capped():
+
+    policy = RetryPolicy(base=2, cap=10)
+
+    for attempt in range(10):
+        assert 0 <= policy.backoff(attempt) <= min(10, 2 * 2 ** attempt)
+
+
+def test_circuit_opens_and_half_opens(clock):
+
+    breaker = CircuitBreaker('api.github.com', failure_threshold=2, reset_after=60)
+
+    breaker.failure()
+    assert breaker.allow()
+
+    breaker.failure()
+    assert not breaker.allow()
+    assert breaker.wait_time() == 60
+
+    clock.sleep(60)
+    # One trial request, the others wait for its result
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.success()
+    assert breaker.allow()
+
+
+def test_open_circuit_raises_or_waits(clock):
+
+    policy = RetryPolicy()
+    breaker = policy.breaker(URL)
+    for index in range(retry.FAILURE_THRESHOLD):
+        breaker.failure()
+
+    request, calls = _requests(Response(200))
+
+    with pytest.raises(CircuitOpenError):
+        policy.call(URL, request)
+
+    assert policy.call(URL, request, wait=True).status_code == 200
+    assert clock.now == 1000 + retry.RESET_AFTER
+
+
+def test_breaker_per_host():
+
+    policy = RetryPolicy()
+
+    assert policy.breaker(URL) is policy.breaker('https://api.github.com/search/code')
+    assert policy.breaker(URL) is not policy.breaker('https://raw.githubusercontent.com/o/r/m/a.py')
+
+
+@pytest.mark.parametrize('response, transient', [
+    (None, True),
+    (Response(500), True),
+    (Response(502), True),
+    (Response(429), True),
+    (Response(403, {'X-RateLimit-Remaining': '0'}), True),
+    (Response(403, {'Retry-After': '30'}), True),
+    (Response(403, {}, 'You have exceeded a secondary rate limit'), True),
+    (Response(403, {'X-RateLimit-Remaining': '10'}, 'Resource not accessible'), False),
+    (Response(404), False),
+    (Response(422), False),
+    (Response(200), False),
+])
+def test_is_transient(response, transient):
+    assert is_transient(response) == transient
+
+
+def test_dead_letters_drain():
+
+    dead_letters = DeadLetters()
+    dead_letters.add({'html_url': 'a'})
+    dead_letters.add({'html_url': 'b'})
+
+    assert len(dead_letters) == 2
+    assert [item['html_url'] for item in dead_letters.drain()] == ['a', 'b']
+    assert len(dead_letters) == 0
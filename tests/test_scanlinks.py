@@ -0,0 +1,137 @@
+import base64
+import time
+
+import pytest
+
+import scanlinks
+from detectors import load_detectors
+from ignore_rules import load_filter
+
+
+class Scanner:
+
+    def __init__(self):
+        self.blocks = []
+        self.findings = self
+
+    def add(self, *finding):
+        pass
+
+    def report(self, block):
+        self.blocks.append(block)
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+
+    scanner = Scanner()
+
+    monkeypatch.setattr(scanlinks, 'SCANNER', scanner)
+    monkeypatch.setattr(scanlinks, 'DETECTORS', load_detectors(scanlinks.SCAN_DETECTORS))
+    monkeypatch.setattr(scanlinks, 'IGNORE_LINKS', load_filter('links'))
+    monkeypatch.setattr(scanlinks, 'DOMAIN', 'acme')
+
+    return scanner
+
+
+def _content(text):
+    return base64.b64encode(text.encode()).decode()
+
+
+def test_repeated_links_count_towards_the_cutoff(scanner):
+
+    text = ' '.join(['https://github.com/acme/repo'] * (scanlinks.MAX_MATCH_COUNTS + 1))
+
+    assert scanlinks._search_content('https://github.com/o/r/blob/m/a', _content(text)) == []
+    assert scanner.blocks == []
+
+
+def test_links_are_reported_once(scanner):
+
+    text = 'https://github.com/acme/repo https://github.com/acme/repo https://github.com/other'
+
+    found = scanlinks._search_content('https://github.com/o/r/blob/m/a', _content(text))
+
+    assert found == ['https://github.com/acme/repo', 'https://github.com/other']
+    assert scanner.blocks == ['\nFound in https://github.com/o/r/blob/m/a\nhttps://github.com/acme/repo\nhttps://github.com/other\n']
+
+
+class CrawlScanner:
+
+    def __init__(self, links, slow=(), budget=None):
+        self.links = links
+        self.slow = slow
+        self.budget = budget
+        self.started = []
+        self.finished = []
+
+    def scan_pages(self, url):
+
+        account = url.split('user%3A')[1].split('+')[0]
+        self.started.append(account)
+
+        if account in self.slow:
+            time.sleep(0.3)
+
+        self.finished.append(account)
+
+        return [f'https://github.com/{linked}' for linked in self.links.get(account, [])]
+
+    def budget_spent(self):
+        return self.budget(self) if self.budget else None
+
+
+@pytest.fixture
+def crawl_settings(monkeypatch):
+    monkeypatch.setattr(scanlinks, 'CRAWL_DEPTH', 3)
+    monkeypatch.setattr(scanlinks, 'CRAWL_THREADS', 2)
+    monkeypatch.setattr(scanlinks, 'MAX_CRAWL_TARGETS', 100)
+
+
+def test_slow_account_does_not_hold_up_the_crawl(crawl_settings, monkeypatch):
+
+    scanner = CrawlScanner({'fast': ['next'], 'next': ['last']}, slow=['slow'])
+    monkeypatch.setattr(scanlinks, 'SCANNER', scanner)
+
+    scanlinks.crawl('acme', ['https://github.com/slow', 'https://github.com/fast'])
+
+    assert sorted(scanner.started) == ['fast', 'last', 'next', 'slow']
+    assert scanner.finished[-1] == 'slow'
+
+
+def test_crawl_stops_on_targets_and_budget(crawl_settings, monkeypatch):
+
+    links = {'a': ['b', 'c', 'd', 'e']}
+
+    scanner = CrawlScanner(links)
+    monkeypatch.setattr(scanlinks, 'SCANNER', scanner)
+    monkeypatch.setattr(scanlinks, 'MAX_CRAWL_TARGETS', 3)
+    scanlinks.crawl('acme', ['https://github.com/a'])
+
+    assert len(scanner.started) == 3
+
+    scanner = CrawlScanner(links, budget=lambda scanner: 'reached 1 API calls' if scanner.started else None)
+    monkeypatch.setattr(scanlinks, 'SCANNER', scanner)
+    monkeypatch.setattr(scanlinks, 'MAX_CRAWL_TARGETS', 100)
+    scanlinks.crawl('acme', ['https://github.com/a'])
+
+    assert scanner.started == ['a']
+
+
+def test_crawl_skips_the_target_and_failed_accounts(crawl_settings, monkeypatch):
+
+    scanner = CrawlScanner({'a': ['acme', 'b']})
+    scan_pages = scanner.scan_pages
+
+    def failing_scan_pages(url):
+        result = scan_pages(url)
+        if 'b+' in url:
+            raise Exception('failed')
+        return result
+
+    scanner.scan_pages = failing_scan_pages
+    monkeypatch.setattr(scanlinks, 'SCANNER', scanner)
+
+    scanlinks.crawl('Acme', ['https://github.com/a'])
+
+    assert sorted(scanner.started) == ['a', 'b']
@@ -0,0 +1,103 @@
+import time
+
+from concurrency import AdaptiveConcurrency
+from retry import RetryPolicy
+from scanner import Scanner
+
+
+def _scanner(pages, process_item, **options):
+
+    scanner = Scanner('target', None, process_item, **options)
+    scanner.start_time = time.time()
+    scanner.concurrency = AdaptiveConcurrency()
+    scanner.retry = RetryPolicy()
+
+    def get_search_page(url):
+        return pages[url].pop(0) if isinstance(pages[url], list) else pages[url]
+
+    scanner._get_search_page = get_search_page
+
+    return scanner
+
+
+def test_scan_pages_returns_the_values_of_all_pages():
+
+    pages = {
+        'p1': ({'items': [1, 2]}, 'p2'),
+        'p2': ({'items': [3]}, None),
+    }
+    scanner = _scanner(pages, lambda item: [f'v{item}'] if item != 2 else None)
+
+    assert sorted(scanner.scan_pages('p1')) == ['v1', 'v3']
+    assert len(scanner.failed_pages) == 0
+
+
+def test_failed_items_and_pages_are_redriven():
+
+    failed = {1: 1}
+
+    def process_item(item):
+        if failed.get(item):
+            failed[item] = failed[item] - 1
+            scanner.dead_letters.add(item)
+            return None
+        return [f'v{item}']
+
+    pages = {
+        'p1': ({'items': [1]}, 'p2'),
+        'p2': [(None, None), ({'items': [2]}, None)],
+    }
+    scanner = _scanner(pages, process_item)
+
+    assert scanner.scan_pages('p1') == []
+    assert scanner.failed_pages.items == ['p2']
+    assert scanner.dead_letters.items == [1]
+
+    assert sorted(scanner.redrive_dead_letters()) == ['v1', 'v2']
+    assert len(scanner.failed_pages) == 0
+    assert len(scanner.dead_letters) == 0
+
+
+def test_items_still_failing_are_given_up(capsys):
+
+    def process_item(item):
+        scanner.dead_letters.add(item)
+
+    scanner = _scanner({'p1': ({'items': [{'html_url': 'a'}]}, None)}, process_item)
+    scanner.scan_pages('p1')
+
+    assert scanner.redrive_dead_letters() == []
+    assert 'Failed: a' in capsys.readouterr().out
+    assert len(scanner.dead_letters) == 0
+
+
+def test_budget_spent():
+
+    scanner = _scanner({}, None, max_seconds=60, max_calls=2)
+
+    assert scanner.budget_spent() is None
+
+    scanner.concurrency.requests = 2
+    assert scanner.budget_spent() == 'reached 2 API calls'
+
+    scanner.start_time = time.time() - 60
+    assert scanner.budget_spent() == 'reached 60 seconds'
+
+
+def test_report_writes_whole_blocks(tmp_path, monkeypatch):
+
+    from multiprocessing.pool import ThreadPool as Pool
+
+    monkeypatch.chdir(tmp_path)
+    scanner = Scanner('target', None, None)
+
+    blocks = [f'\nFound in {index}\n' + ''.join(f'{index}-{line}\n' for line in range(20)) for index in range(50)]
+
+    pool = Pool(10)
+    pool.map(scanner.report, blocks)
+    pool.close()
+
+    text = (tmp_path / 'target.txt').read_text()
+
+    for block in blocks:
+        assert f'{block}\n' in text
@@ -0,0 +1,77 @@
+from search import SearchPages
+
+
+def _fetch(pages):
+
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return pages[url]
+
+    return fetch, fetched
+
+
+PAGES = {
+    'p1': ({'items': [1]}, 'p2'),
+    'p2': ({'items': [2]}, 'p3'),
+    'p3': ({'items': [3]}, None),
+}
+
+
+def test_follows_next_links():
+
+    fetch, fetched = _fetch(PAGES)
+    pages = SearchPages('p1', fetch)
+
+    assert [items for url, items in pages] == [[1], [2], [3]]
+    assert fetched == ['p1', 'p2', 'p3']
+    assert pages.stop_reason == 'last page'
+
+
+def test_failed_page_can_be_resumed():
+
+    fetch, fetched = _fetch({'p1': PAGES['p1'], 'p2': (None, None)})
+    pages = SearchPages('p1', fetch)
+
+    assert [url for url, items in pages] == ['p1']
+    assert pages.pages == 1
+    assert pages.failed_url == 'p2'
+    assert pages.stop_reason == 'failed to fetch p2'
+
+
+def test_error_response_is_not_a_failure():
+
+    fetch, fetched = _fetch({'p1': ({}, None)})
+    pages = SearchPages('p1', fetch)
+
+    assert list(pages) == []
+    assert pages.failed_url is None
+    assert pages.stop_reason == 'error response for p1'
+
+
+def test_stops_after_empty_pages():
+
+    fetch, fetched = _fetch(PAGES)
+    pages = SearchPages('p1', fetch, max_empty_pages=2)
+
+    for url, items in pages:
+        pages.report(0)
+
+    assert fetched == ['p1', 'p2']
+
+
+def test_zero_budgets_are_limits():
+
+    fetch, fetched = _fetch(PAGES)
+
+    assert list(SearchPages('p1', fetch, max_pages=0)) == []
+    assert list(SearchPages('p1', fetch, max_calls=0, calls=lambda: 0)) == []
+    assert fetched == []
+
+
+def test_shared_start_time():
+
+    fetch, fetched = _fetch(PAGES)
+
+    assert list(SearchPages('p1', fetch, max_seconds=60, start_time=1)) == []